@@ -4,7 +4,7 @@ ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
 if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
 
 
-from thermostat_agent import ThermostatAgent, Config, Percept, Action
+from thermostat_agent import ThermostatAgent, Config, Percept, Action, ACTION_CODES
 
 def make_agent(mode="auto", sp_h=21.0, sp_c=24.0, deadband=1.0, eco=2.0):
     return ThermostatAgent(Config(mode=mode, setpoint_h=sp_h, setpoint_c=sp_c,
@@ -31,3 +31,53 @@ def test_auto_selects_side_with_stronger_violation():
     ag = make_agent(mode="auto", sp_h=21.0, sp_c=24.0, deadband=1.0)
     # Much colder than heating band, far from cooling band → should heat
     assert ag.decide(Percept(temperature=18.0, occupied=True)) == Action.HEAT_ON
+
+def test_auto_overlapping_setpoints_picks_larger_violation():
+    # Misconfigured: heating band starts above cooling band; 23.0 violates both
+    ag = make_agent(mode="auto", sp_h=25.0, sp_c=22.0, deadband=1.0)
+    assert ag.decide(Percept(temperature=23.0, occupied=True)) == Action.HEAT_ON  # vh=1.5 > vc=0.5
+    assert ag.decide(Percept(temperature=24.2, occupied=True)) == Action.COOL_ON  # vh=0.3 < vc=1.7
+
+def test_decide_batch_matches_sequential_decide():
+    import random
+    rng = random.Random(7)
+    temps = [round(rng.uniform(16.0, 28.0), 1) for _ in range(300)]
+    occ = [rng.random() < 0.6 for _ in range(300)]
+    for mode in ("heating", "cooling", "auto"):
+        seq = make_agent(mode=mode)
+        expected = [seq.decide(Percept(temperature=t, occupied=o)) for t, o in zip(temps, occ)]
+        codes = make_agent(mode=mode).decide_batch(temps, occ)
+        assert [ACTION_CODES[c] for c in codes.tolist()] == expected
+
+def test_decide_batch_matches_decide_off_grid():
+    import random
+    rng = random.Random(11)
+    # readings between the 0.05 °C steps, the midpoint between bands and the band edges
+    temps = [20.48, 20.52, 21.49, 24.51, 22.75, 20.5, 24.5] + [rng.uniform(16.0, 28.0) for _ in range(300)]
+    occ = [True] * 7 + [rng.random() < 0.6 for _ in range(300)]
+    for mode in ("heating", "cooling", "auto"):
+        seq = make_agent(mode=mode)
+        expected = [seq.decide(Percept(temperature=t, occupied=o)) for t, o in zip(temps, occ)]
+        codes = make_agent(mode=mode).decide_batch(temps, occ)
+        assert [ACTION_CODES[c] for c in codes.tolist()] == expected
+    assert ACTION_CODES[make_agent(mode="heating").decide_batch([20.48], [True])[0]] == Action.HEAT_ON
+
+def test_decide_batch_q_matches_decide_batch_on_sensor_readings():
+    import random
+    from thermostat_agent import quantize_temps
+    rng = random.Random(13)
+    # 0.1 °C sensor data, including every band edge (occupied and eco)
+    temps = [18.5, 19.5, 20.5, 21.5, 23.5, 24.5, 25.5, 26.5] + [round(rng.uniform(16.0, 28.0), 1) for _ in range(500)]
+    occ = [True, False] * 4 + [rng.random() < 0.6 for _ in range(500)]
+    for mode in ("heating", "cooling", "auto"):
+        ag = make_agent(mode=mode)
+        assert ag.decide_batch_q(quantize_temps(temps), occ).tolist() == ag.decide_batch(temps, occ).tolist()
+
+def test_simulate_cli_prints_one_line_per_step(tmp_path, capsys):
+    import json
+    from thermostat_agent import main
+    path = tmp_path / "s.json"
+    path.write_text(json.dumps([{"temp": 18.8, "occupied": True}, {"temp": 24.8, "occupied": False}]))
+    assert main(["simulate", "--scenarios", str(path)]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["t=18.8°C  occ=True   -> HEAT_ON", "t=24.8°C  occ=False  -> OFF"]
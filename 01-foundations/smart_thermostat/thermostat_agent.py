@@ -75,16 +75,13 @@ Inputs:
      else:                     return COOL_ON if last_action == COOL_ON else OFF
 
    AUTO MODE:
-     need_heat = (T < (sp_h - half))
-     need_cool = (T > (sp_c + half))
+     vh = (sp_h - half) - T      # > 0 → heating band violated
+     vc = T - (sp_c + half)      # > 0 → cooling band violated
 
-     if need_heat and not need_cool:
-        return HEAT_ON
-     elif need_cool and not need_heat:
+     if vh > 0 and vh >= vc:
+        return HEAT_ON           # stronger (or only) violation is on the heating side
+     elif vc > 0:
         return COOL_ON
-     elif need_heat and need_cool:
-        # This indicates overlapping or ill-configured setpoints; fall back safely:
-        return last_action
      else:
         # Inside both bands → prefer OFF unless hysteresis keeps one actuator on:
         if last_action == HEAT_ON:
@@ -109,7 +106,7 @@ WHY THIS WORKS
 EDGE CASES & GUARDS
 -------------------
 - Misconfigured setpoints (e.g., sp_h >= sp_c with small deadband) can cause
-  ambiguous "both violated" outcomes in AUTO; code falls back to the last action.
+  "both violated" outcomes in AUTO; code picks the larger violation (ties heat).
 - Extremely small deadband (e.g., 0.1°C) can still oscillate if sensors are noisy.
   Increase deadband or add sensor smoothing if needed.
 - Occupancy flipping rapidly can cause frequent reconfiguration; in practice one
@@ -125,6 +122,27 @@ Single decision:
 Simulate a sequence (JSON lines with {"temp": float, "occupied": bool}):
   python thermostat_agent.py simulate --scenarios scenarios.json
 
+BATCH DECISIONS
+---------------
+`ThermostatAgent.decide_batch(temps, occupied)` evaluates a whole scenario with
+NumPy comparisons and returns int8 action codes (see ACTION_CODES). Only the
+rows whose outcome depends on the previous action (hysteresis) are resolved in
+a Python loop, in order, so results match calling `decide` step by step.
+It compares float64 temperatures against the same float band edges `decide`
+uses. `decide_batch_q` is the compact variant for data already quantized to
+int16 in 0.05 °C units (`quantize_temps`): readings finer than that are
+rounded there, so it can disagree with `decide` near a band edge.
+
+NATIVE BUILD (OPTIONAL)
+-----------------------
+The module is fully annotated and compiles unchanged with mypyc:
+  pip install mypy && mypyc thermostat_agent.py
+This drops `thermostat_agent.<abi>.so` next to the source; Python imports the
+extension in preference to the .py, so `decide` and the CLI's per-step
+logic run natively (`simulate` spends its time in NumPy either way). Delete
+the .so to go back to pure Python.
+`Action` stays a str Enum so CLI output is identical in both builds.
+
 TESTING NOTES
 -------------
 - Unit tests assert key thresholds (turn on below band, off above band, eco behavior,
@@ -142,6 +160,7 @@ EXTENSIONS
 from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
+from typing import Callable, Dict, Optional, Tuple
 import argparse, json, sys
 
 class Action(str, Enum):
@@ -149,7 +168,18 @@ class Action(str, Enum):
     COOL_ON = "COOL_ON"
     OFF = "OFF"
 
-@dataclass
+# Local aliases for the hot path (skip enum attribute resolution in decide)
+_HEAT, _COOL, _OFF = Action.HEAT_ON, Action.COOL_ON, Action.OFF
+
+# int8 codes used by decide_batch: ACTION_CODES[code] -> Action
+ACTION_CODES = (Action.OFF, Action.HEAT_ON, Action.COOL_ON)
+_CODE_OF = {a: i for i, a in enumerate(ACTION_CODES)}
+
+# decide_batch_q compares int16 temperatures in 0.05 °C units (exact for 0.1 °C
+# readings and for half-deadbands of 0.1 °C settings)
+TEMP_SCALE = 20
+
+@dataclass(slots=True, frozen=True)
 class Config:
     mode: str = "auto"            # "heating" | "cooling" | "auto"
     setpoint_h: float = 21.0      # heating comfort setpoint (°C)
@@ -157,67 +187,153 @@ class Config:
     deadband: float = 1.0         # total width (°C)
     eco_offset: float = 2.0       # relax comfort when unoccupied (°C)
 
-@dataclass
+DEFAULT_CONFIG = Config()  # shared; frozen so it cannot be mutated
+
+@dataclass(slots=True, frozen=True)
 class Percept:
     temperature: float
     occupied: bool
 
 class ThermostatAgent:
-    def __init__(self, cfg: Config):
+    # Bound per instance in __init__ to the rule for cfg.mode, so the hot path
+    # never re-dispatches on the mode string.
+    decide: Callable[[Percept], Action]
+
+    def __init__(self, cfg: Optional[Config] = None):
+        cfg = cfg if cfg is not None else DEFAULT_CONFIG
+        mode = cfg.mode.lower()
+        if mode not in ("heating", "cooling", "auto"):
+            raise ValueError("mode must be one of: heating|cooling|auto")
         self.cfg = cfg
+        self._mode = mode
         self._last_action: Action = Action.OFF
+        # Band edges (sp_h_lo, sp_h_hi, sp_c_lo, sp_c_hi) are constant per
+        # occupancy state, so compute both sets once.
+        half = cfg.deadband / 2.0
+        self._bands: Dict[bool, Tuple[float, float, float, float]] = {}
+        for occupied in (True, False):
+            sp_h = cfg.setpoint_h - (0 if occupied else cfg.eco_offset)
+            sp_c = cfg.setpoint_c + (0 if occupied else cfg.eco_offset)
+            self._bands[occupied] = (sp_h - half, sp_h + half, sp_c - half, sp_c + half)
+        self.decide = {
+            "heating": self._decide_heating,
+            "cooling": self._decide_cooling,
+            "auto": self._decide_auto,
+        }[mode]
+
+    def _decide_heating(self, p: Percept) -> Action:
+        t = p.temperature
+        sp_h_lo, sp_h_hi, _, _ = self._bands[bool(p.occupied)]
+        if t < sp_h_lo:
+            action = _HEAT
+        elif t > sp_h_hi:
+            action = _OFF
+        else:  # within band: stickiness (hysteresis)
+            action = _HEAT if self._last_action is _HEAT else _OFF
+        self._last_action = action
+        return action
 
-    def decide(self, p: Percept) -> Action:
-        # derive effective setpoints
-        sp_h = self.cfg.setpoint_h - (0 if p.occupied else self.cfg.eco_offset)
-        sp_c = self.cfg.setpoint_c + (0 if p.occupied else self.cfg.eco_offset)
-        half = self.cfg.deadband / 2.0
-
-        def heat_rule(temp: float) -> Action:
-            if temp < sp_h - half:
-                return Action.HEAT_ON
-            if temp > sp_h + half:
-                return Action.OFF
-            # within band: stickiness (hysteresis)
-            return self._last_action if self._last_action == Action.HEAT_ON else Action.OFF
-
-        def cool_rule(temp: float) -> Action:
-            if temp > sp_c + half:
-                return Action.COOL_ON
-            if temp < sp_c - half:
-                return Action.OFF
-            return self._last_action if self._last_action == Action.COOL_ON else Action.OFF
-
-        mode = self.cfg.mode.lower()
-        if mode == "heating":
-            action = heat_rule(p.temperature)
-        elif mode == "cooling":
-            action = cool_rule(p.temperature)
-        elif mode == "auto":
-            # Choose the stronger violation; break ties using last action to avoid flipping
-            need_heat = (p.temperature < sp_h - half)
-            need_cool = (p.temperature > sp_c + half)
-            if need_heat and not need_cool:
-                action = Action.HEAT_ON
-            elif need_cool and not need_heat:
-                action = Action.COOL_ON
-            elif need_heat and need_cool:
-                # Impossible if setpoints overlap properly; fall back to last action
-                action = self._last_action
-            else:
-                # inside both bands → prefer to turn off, unless hysteresis keeps one on
-                if self._last_action == Action.HEAT_ON:
-                    action = heat_rule(p.temperature)
-                elif self._last_action == Action.COOL_ON:
-                    action = cool_rule(p.temperature)
-                else:
-                    action = Action.OFF
+    def _decide_cooling(self, p: Percept) -> Action:
+        t = p.temperature
+        _, _, sp_c_lo, sp_c_hi = self._bands[bool(p.occupied)]
+        if t > sp_c_hi:
+            action = _COOL
+        elif t < sp_c_lo:
+            action = _OFF
         else:
-            raise ValueError("mode must be one of: heating|cooling|auto")
+            action = _COOL if self._last_action is _COOL else _OFF
+        self._last_action = action
+        return action
 
+    def _decide_auto(self, p: Percept) -> Action:
+        t = p.temperature
+        last = self._last_action
+        sp_h_lo, sp_h_hi, sp_c_lo, sp_c_hi = self._bands[bool(p.occupied)]
+        # Signed violations: choose the stronger one (ties favour heating)
+        vh = sp_h_lo - t
+        vc = t - sp_c_hi
+        if vh > 0 and vh >= vc:
+            action = _HEAT
+        elif vc > 0:
+            action = _COOL
+        # inside both bands → prefer to turn off, unless hysteresis keeps one on
+        elif last is _HEAT:
+            action = _OFF if t > sp_h_hi else _HEAT
+        elif last is _COOL:
+            action = _OFF if t < sp_c_lo else _COOL
+        else:
+            action = _OFF
         self._last_action = action
         return action
 
+    def decide_batch(self, temps, occupied):
+        """Vectorized `decide` over °C temperatures; returns int8 action codes."""
+        import numpy as np  # lazy import: single decisions stay dependency-free
+
+        return self._decide_codes(np.asarray(temps, dtype=np.float64), occupied, self._bands)
+
+    def decide_batch_q(self, temps_q, occupied):
+        """`decide_batch` over temperatures already quantized by `quantize_temps`."""
+        import numpy as np
+
+        # band edges in the same integer units; comparisons stay int16
+        edges = {o: tuple(int(round(e * TEMP_SCALE)) for e in self._bands[o]) for o in (True, False)}
+        return self._decide_codes(np.asarray(temps_q, dtype=np.int16), occupied, edges)
+
+    def _decide_codes(self, temps, occupied, edges):
+        import numpy as np
+
+        occ = np.asarray(occupied, dtype=bool)
+        off, heat, cool = 0, 1, 2
+        h_lo, h_hi, c_lo, c_hi = (
+            np.where(occ, *np.array([a, b], dtype=temps.dtype)) for a, b in zip(edges[True], edges[False])
+        )
+        need_heat = temps < h_lo
+        above_h = temps > h_hi
+        need_cool = temps > c_hi
+        below_c = temps < c_lo
+
+        out = np.zeros(temps.shape, dtype=np.int8)
+        mode = self._mode
+        if mode == "heating":
+            out[need_heat] = heat
+            sticky = ~(need_heat | above_h)
+        elif mode == "cooling":
+            out[need_cool] = cool
+            sticky = ~(need_cool | below_c)
+        else:  # auto
+            pick_heat = need_heat & ((h_lo - temps) >= (temps - c_hi))
+            out[pick_heat] = heat
+            out[need_cool & ~pick_heat] = cool
+            # outside both hysteresis bands → OFF regardless of the last action
+            sticky = ~(need_heat | need_cool | (above_h & below_c))
+
+        # hysteresis is sequential: resolve the (rare) in-band rows in order
+        last = _CODE_OF[self._last_action]
+        for i in np.flatnonzero(sticky):
+            if i > 0:
+                last = int(out[i - 1])
+            if mode == "heating":
+                out[i] = heat if last == heat else off
+            elif mode == "cooling":
+                out[i] = cool if last == cool else off
+            elif last == heat:
+                out[i] = off if above_h[i] else heat
+            elif last == cool:
+                out[i] = off if below_c[i] else cool
+            else:
+                out[i] = off
+
+        if out.size:
+            self._last_action = ACTION_CODES[int(out[-1])]
+        return out
+
+
+def quantize_temps(temps):
+    """°C → int16 in steps of 1/TEMP_SCALE °C (half the sensor's 0.1 °C resolution)."""
+    import numpy as np
+    return np.rint(np.asarray(temps, dtype=np.float64) * TEMP_SCALE).astype(np.int16)
+
 # ------------- CLI -------------
 def _bool(s: str) -> bool:
     return s.lower() in ("1", "true", "yes", "y")
@@ -260,10 +376,17 @@ def main(argv=None):
     if args.cmd == "simulate":
         with open(args.scenarios, "r", encoding="utf-8") as f:
             data = json.load(f)
-        for step in data:
-            p = Percept(temperature=float(step["temp"]), occupied=bool(step["occupied"]))
-            a = agent.decide(p)
-            print(f't={p.temperature:>4.1f}°C  occ={p.occupied!s:<5}  -> {a.value}')
+        import numpy as np
+        temps = np.fromiter((s["temp"] for s in data), dtype=np.float64, count=len(data))
+        occupied = np.fromiter((s["occupied"] for s in data), dtype=bool, count=len(data))
+        codes = agent.decide_batch(temps, occupied)
+        # format everything, then write once instead of one print per step
+        lines = [
+            f't={t:>4.1f}°C  occ={o!s:<5}  -> {ACTION_CODES[a].value}'
+            for t, o, a in zip(temps.tolist(), occupied.tolist(), codes.tolist())
+        ]
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
         return 0
 
 if __name__ == "__main__":
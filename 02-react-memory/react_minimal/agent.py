@@ -32,7 +32,8 @@ LOOP LOGIC (high level)
 1) Build messages:
    - system: hard rules for strict JSON, plus dynamic tool registry summary
    - user:   user query + short-term scratchpad (previous steps)
-2) Call the LLM. Parse the first JSON object from the response.
+2) Call the LLM. Parse the first balanced JSON object from the response
+   (`json.JSONDecoder.raw_decode`, so trailing prose is ignored).
    JSON schema per step (enforced by prompt):
      {
        "thought": str,
@@ -49,7 +50,11 @@ LOOP LOGIC (high level)
 
 TRACING
 -------
-When AgentConfig.verbose=True:
+Trace lines go to the "react" logger at DEBUG level with lazy %-formatting,
+so nothing is formatted when tracing is off. When AgentConfig.verbose=True the
+agent traces through its own DEBUG logger with a stdout handler ("[react] ..."
+lines) instead; the shared "react" logger is never reconfigured, so one
+verbose agent doesn't make later quiet ones print:
 - Each step logs: action tool & payload, observation, or final output.
 - Logs intentionally **do not** print chain-of-thought text (only structure).
 
@@ -67,30 +72,83 @@ EXTENSION IDEAS
 ---------------
 - Add more tools (unit conversion, web search, RAG).
 - Add a "summary-on-exit": on final, write a 1-line memory via notes_write.
-- Support streaming model responses for UI.
+- Surface streamed tokens to a UI (OpenAIChat already streams internally and
+  stops reading once the step's JSON object is complete).
 - Replace JSON extraction with a strict JSON mode or function-calling API.
 
 TESTING & PORTABILITY
 ---------------------
 - Tests use a `MockLLM` that feeds deterministic JSON strings (no network).
-- The OpenAI SDK is imported lazily to keep tests light.
+- The OpenAI SDK and `.env` loading are deferred to `OpenAIChat` to keep tests light.
 - Works cross-platform on Python 3.10/3.11.
 """
 
 
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
+import hashlib
 import json
+import logging
 import os
-
-from dotenv import load_dotenv
+import sys
 
 from prompts import SYSTEM_PROMPT, TOOL_SPEC_TEMPLATE, USER_TEMPLATE
 from memory import ShortTermMemory, LongTermMemory
 from tools import build_tool_registry, tool_summaries, call_tool
 
-load_dotenv()
+log = logging.getLogger("react")
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    # Extract the first balanced JSON object from text in one C-level pass;
+    # trailing prose (even with braces) after the object is ignored.
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            return obj
+        start = text.find("{", start + 1)
+    return None
+
+
+class _BraceScanner:
+    """Incremental brace-depth tracker (string/escape aware) for streamed JSON."""
+
+    __slots__ = ("depth", "in_str", "escape")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_str = False
+        self.escape = False
+
+    def feed(self, text: str) -> bool:
+        """Consume more text; True if a top-level object closed within it."""
+        for ch in text:
+            if self.in_str:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_str = False
+            elif ch == '"':
+                if self.depth:
+                    self.in_str = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return True
+        return False
 
 # ------------------ LLM interface ------------------
 
@@ -99,6 +157,14 @@ class LLM:
         raise NotImplementedError
 
 
+@lru_cache(maxsize=None)
+def _load_env() -> None:
+    # Read .env once per process, and only when a real client is built
+    # (MockLLM test paths never touch it).
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
 class OpenAIChat(LLM):
     """
     OpenAI-compatible chat client.
@@ -112,9 +178,16 @@ class OpenAIChat(LLM):
     Optional:
       - MODEL (defaults to gpt-4o-mini)
       - OPENAI_BASE_URL (when using a router)
+
+    Completions are deterministic (temperature=0), so responses are memoized
+    in a small per-client LRU keyed by a BLAKE2 hash of the messages;
+    identical prompts skip the network round-trip. Set `cache_size=0` to disable.
     """
+    cache_size = 128
+
     def __init__(self, model: Optional[str] = None, *, api_key: Optional[str] = None, base_url: Optional[str] = None):
         from openai import OpenAI  # lazy import to keep tests light
+        _load_env()
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set. Put it in .env or environment.")
@@ -125,58 +198,101 @@ class OpenAIChat(LLM):
         # If a base_url is provided, point the SDK to that router; otherwise use default
         self.client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
         self.model = model or os.getenv("MODEL", "gpt-4o-mini")
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
 
     def complete(self, messages: List[Dict[str, str]]) -> str:
-        resp = self.client.chat.completions.create(model=self.model, messages=messages, temperature=0)
-        return resp.choices[0].message.content or "{}"
+        if not self.cache_size:
+            return self._complete(messages)
+        payload = json.dumps([self.model, messages], ensure_ascii=False).encode("utf-8")
+        key = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        out = self._complete(messages)
+        self._cache[key] = out
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return out
+
+    def _complete(self, messages: List[Dict[str, str]]) -> str:
+        # Stream and stop reading as soon as the first top-level JSON object
+        # closes; the step contract needs nothing after it.
+        stream = self.client.chat.completions.create(
+            model=self.model, messages=messages, temperature=0, stream=True
+        )
+        scanner = _BraceScanner()
+        parts: List[str] = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                # the scanner is a cheap trigger; confirm with a real parse
+                if scanner.feed(delta) and _first_json_object("".join(parts)) is not None:
+                    break
+        finally:
+            stream.close()
+        return "".join(parts) or "{}"
 
 
 # ------------------ ReAct Agent ------------------
 
-@dataclass
+def _trace_logger() -> logging.Logger:
+    # Private to one verbose agent: built outside the logging registry, so its
+    # level and handler can't leak into "react" or into other agents.
+    logger = logging.Logger("react", logging.DEBUG)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("[react] %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+@dataclass(slots=True, frozen=True)
 class AgentConfig:
     max_steps: int = 5
     verbose: bool = False
 
 
+# Shared default (frozen, so it is safe to hand to every agent)
+DEFAULT_AGENT_CONFIG = AgentConfig()
+
+
 class ReActAgent:
     def __init__(self, llm: Optional[LLM] = None, config: Optional[AgentConfig] = None):
         self.llm = llm or OpenAIChat()
-        self.config = config or AgentConfig()
+        self.config = config if config is not None else DEFAULT_AGENT_CONFIG
+        self.log = _trace_logger() if self.config.verbose else log
         self.long_mem = LongTermMemory()
         self.tools = build_tool_registry(self.long_mem)
         self.short_mem = ShortTermMemory()
 
-    # simple logger
-    def _log(self, msg: str) -> None:
-        if self.config.verbose:
-            print(f"[react] {msg}")
-
-    def _build_messages(self, question: str) -> List[Dict[str, str]]:
-        tool_spec = TOOL_SPEC_TEMPLATE.format(tool_summaries=tool_summaries(self.tools))
-        scratchpad = self.short_mem.to_scratchpad()
-        return [
-            {"role": "system", "content": SYSTEM_PROMPT + "\n" + tool_spec},
-            {"role": "user", "content": USER_TEMPLATE.format(question=question, scratchpad=scratchpad)},
-        ]
-
     @staticmethod
     def _parse_json_block(text: str) -> Dict[str, Any]:
-        # Extract first JSON object from text
-        start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1 or end <= start:
+        obj = _first_json_object(text)
+        if obj is None:
             raise ValueError("No JSON object found in model output")
-        return json.loads(text[start : end + 1])
+        return obj
 
     def run(self, question: str) -> str:
+        # The tool registry is fixed for the run: render the system message once
+        # and only rebuild the user message as the scratchpad grows.
+        tool_spec = TOOL_SPEC_TEMPLATE.format(tool_summaries=tool_summaries(self.tools))
+        sys_msg = {"role": "system", "content": SYSTEM_PROMPT + "\n" + tool_spec}
         for step in range(1, self.config.max_steps + 1):
-            messages = self._build_messages(question)
+            scratchpad = self.short_mem.to_scratchpad()
+            messages = [
+                sys_msg,
+                {"role": "user", "content": USER_TEMPLATE.format(question=question, scratchpad=scratchpad)},
+            ]
             raw = self.llm.complete(messages)
             try:
                 obj = self._parse_json_block(raw)
             except Exception as e:
-                self._log(f"step={step} non_json_output error={e}")
+                self.log.debug("step=%d non_json_output error=%s", step, e)
                 self.short_mem.add(thought=f"Model returned non-JSON: {e}")
                 continue
 
@@ -185,25 +301,28 @@ class ReActAgent:
             final = obj.get("final")
 
             if action and final:
-                self._log(f"step={step} invalid both action+final present")
+                self.log.debug("step=%d invalid both action+final present", step)
                 self.short_mem.add(thought, observation="Tool+Final both present; choose one only.")
                 continue
 
             if action:
                 tool_name = action.get("tool")
+                if isinstance(tool_name, str):
+                    # tool names repeat every step; share one string object
+                    tool_name = sys.intern(tool_name)
                 payload = action.get("input", {}) or {}
-                self._log(f"step={step} action tool={tool_name} input={payload}")
+                self.log.debug("step=%d action tool=%s input=%s", step, tool_name, payload)
                 observation = call_tool(self.tools, tool_name, payload)
-                self._log(f"step={step} observation={str(observation)[:200]}")
+                self.log.debug("step=%d observation=%.200s", step, observation)
                 self.short_mem.add(thought=thought, action=action, observation=observation)
                 continue
 
             if isinstance(final, str):
-                self._log(f"final={final}")
+                self.log.debug("final=%s", final)
                 return final
 
-            self._log(f"step={step} invalid no action/final")
+            self.log.debug("step=%d invalid no action/final", step)
             self.short_mem.add(thought, observation="Invalid output (no action/final)")
 
-        self._log("terminated: step limit reached")
+        self.log.debug("terminated: step limit reached")
         return "I couldn't complete the task within the step limit."
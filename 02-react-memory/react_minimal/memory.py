@@ -6,22 +6,42 @@ OVERVIEW
 Provides two simple memory utilities:
 
 1) ShortTermMemory
-   - Keeps a list of step dicts: {"thought", "action", "observation"}.
+   - Keeps steps as parallel lists (`thoughts`, `actions`, `observations`);
+     actions are stored already serialized to JSON. `trace` rebuilds the
+     {"thought", "action", "observation"} dicts on demand.
    - `add(...)` appends a new step.
    - `to_scratchpad()` renders a compact, human-readable trace used by the
      prompt so the model can incorporate the latest Observation (ReAct).
+     Each step is rendered once when added, so this is a plain join.
    - This scratchpad is **not shown to end users**; it’s internal context.
 
 2) LongTermMemory
-   - A tiny key→string store persisted to disk (JSON file).
-   - On init, it attempts to load from disk; `set(...)` writes and persists;
-     `get(...)` returns a string or None.
-   - Default path: `<this_dir>/memory.json`. You can override the path.
+   - A tiny key→string store persisted to disk (append-only JSONL log).
+   - On init, it replays the log from disk; `set(...)` appends one
+     `{"key": "text"}` line; `get(...)` returns a string or None.
+   - When the log grows past twice the number of live keys it is compacted
+     into a single snapshot line (written to a temp file, then `os.replace`).
+   - The append handle is opened once, on first write, and reused;
+     `close()` (also registered with `atexit`) fsyncs and releases it.
+   - Default path: `<this_dir>/memory.jsonl`. You can override the path.
+     A legacy single-object JSON file is still read on load, including the
+     old `memory.json` next to a `.jsonl` path that doesn't exist yet; the
+     first write then moves its contents into the log.
+
+SERIALIZATION
+-------------
+JSON goes through `orjson` when installed (compact output, UTF-8 kept as-is),
+otherwise through stdlib `json` configured to produce the same text.
 
 ERROR HANDLING & ROBUSTNESS
 ---------------------------
-- LongTermMemory silently tolerates load/save errors and falls back to an
+- LongTermMemory tolerates load/save errors and keeps working from its
   in-memory dict (keeps demo code resilient for workshops).
+- A line that doesn't parse (e.g. torn by a crash mid-append) is skipped
+  with a warning on the "react.memory" logger; the other lines still load,
+  and the next write rewrites the file without it.
+- Compaction fsyncs the snapshot before `os.replace`, so a crash can't
+  leave an empty file in place of the log.
 - No concurrency/locking; if you need multi-process safety, add a file lock
   or migrate to a lightweight DB.
 
@@ -42,48 +62,146 @@ EXTENSIONS
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
+import atexit
 import json
+import logging
 import os
+import sys
 
-DEFAULT_MEM_PATH = os.path.join(os.path.dirname(__file__), "memory.json")
+try:  # optional fast path; output matches the compact stdlib fallback
+    import orjson
 
-@dataclass
+    def _dumps(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:  # e.g. ints beyond 64 bits in a model's action
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    _loads = json.loads
+
+DEFAULT_MEM_PATH = os.path.join(os.path.dirname(__file__), "memory.jsonl")
+log = logging.getLogger("react.memory")
+_COMPACT_MIN_LINES = 64  # never compact logs shorter than this
+_INTERN_MAX = 64  # short thoughts ("Done", "Use calculator") repeat across steps
+
+@dataclass(slots=True)
 class ShortTermMemory:
-    # Holds a list of {thought, action, observation} for the current session
-    trace: List[Dict[str, Any]] = field(default_factory=list)
+    # Steps of the current session as parallel columns (thought / action JSON /
+    # observation) rather than one dict per step.
+    thoughts: List[str] = field(default_factory=list)
+    actions: List[Optional[str]] = field(default_factory=list)  # serialized once
+    observations: List[Optional[str]] = field(default_factory=list)
+    # Rendered scratchpad text per step; history is frozen, so each step is
+    # serialized once in `add` instead of on every `to_scratchpad` call.
+    _rendered: List[str] = field(default_factory=list, repr=False)
 
     def add(self, thought: str, action: Optional[Dict[str, Any]] = None, observation: Optional[str] = None) -> None:
-        self.trace.append({"thought": thought, "action": action, "observation": observation})
+        action_json = _dumps(action) if action is not None else None
+        if isinstance(thought, str) and len(thought) < _INTERN_MAX:
+            thought = sys.intern(thought)
+        self.thoughts.append(thought)
+        self.actions.append(action_json)
+        self.observations.append(observation)
+        lines = [f"Step {len(self.thoughts)}:\n  THOUGHT: {thought}"]
+        if action:
+            lines.append(f"  ACTION: {action_json}")
+        if observation is not None:
+            lines.append(f"  OBSERVATION: {observation}")
+        self._rendered.append("\n".join(lines))
+
+    @property
+    def trace(self) -> List[Dict[str, Any]]:
+        """Steps as {thought, action, observation} dicts (built on demand)."""
+        return [
+            {"thought": t, "action": _loads(a) if a is not None else None, "observation": o}
+            for t, a, o in zip(self.thoughts, self.actions, self.observations)
+        ]
 
     def to_scratchpad(self) -> str:
-        lines = []
-        for i, step in enumerate(self.trace, 1):
-            lines.append(f"Step {i}:\n  THOUGHT: {step['thought']}")
-            if step.get("action"):
-                lines.append(f"  ACTION: {json.dumps(step['action'], ensure_ascii=False)}")
-            if step.get("observation") is not None:
-                lines.append(f"  OBSERVATION: {step['observation']}")
-        return "\n".join(lines)
+        return "\n".join(self._rendered)
 
 
 class LongTermMemory:
     def __init__(self, path: str = DEFAULT_MEM_PATH):
         self.path = path
         self._data: Dict[str, str] = {}
+        self._log_lines = 0
+        self._fh = None  # append handle, opened on first write
+        self._rewrite = False  # legacy JSON / damaged log: compact before appending
         self._load()
 
     def _load(self) -> None:
+        path = self.path
+        if not os.path.exists(path):
+            root, ext = os.path.splitext(path)
+            if ext != ".jsonl" or not os.path.exists(root + ".json"):
+                return
+            path, self._rewrite = root + ".json", True  # legacy store
         try:
-            if os.path.exists(self.path):
-                with open(self.path, "r", encoding="utf-8") as f:
-                    self._data = json.load(f)
-        except Exception:
-            self._data = {}
-
-    def _save(self) -> None:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            log.warning("cannot read %s: %s", path, e)
+            return
+        try:  # legacy snapshot (whole-file JSON object)
+            data = _loads(raw)
+            if isinstance(data, dict):
+                self._data.update(data)
+                self._log_lines = 1
+                self._rewrite = self._rewrite or b"\n" in raw.strip()
+                return
+        except ValueError:
+            pass
+        # decode line by line: a crash mid-append can cut a character in half
+        for n, ln in enumerate(raw.splitlines(), 1):
+            if not ln.strip():
+                continue
+            try:
+                entry = _loads(ln.decode("utf-8"))
+            except ValueError:  # includes UnicodeDecodeError
+                entry = None
+            if not isinstance(entry, dict):
+                log.warning("%s:%d: skipping unreadable memory line", path, n)
+                self._rewrite = True
+                continue
+            self._data.update(entry)
+            self._log_lines += 1
+        if raw and not raw.endswith(b"\n"):
+            self._rewrite = True  # torn tail: an append would glue onto it
+
+    def _append(self, entry: Dict[str, str]) -> None:
+        if self._fh is None:
+            # one handle for the life of the store; released (and fsynced) by
+            # close(), which also runs at interpreter exit
+            self._fh = open(self.path, "ab", buffering=0)
+            atexit.register(self.close)
+        self._fh.write((_dumps(entry) + "\n").encode("utf-8"))
+        self._log_lines += 1
+
+    def _compact(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_dumps(self._data) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp, self.path)
+        self._log_lines = 1
+        self._rewrite = False
+
+    def _save(self, key: str) -> None:
         try:
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            if self._rewrite:
+                self._compact()
+                return
+            self._append({key: self._data[key]})
+            if self._log_lines > max(2 * len(self._data), _COMPACT_MIN_LINES):
+                self._compact()
         except Exception:
             pass
 
@@ -92,4 +210,14 @@ class LongTermMemory:
 
     def set(self, key: str, text: str) -> None:
         self._data[key] = text
-        self._save()
\ No newline at end of file
+        self._save(key)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            atexit.unregister(self.close)
+            try:
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
\ No newline at end of file
@@ -5,6 +5,7 @@ TEST_DIR = os.path.dirname(__file__)
 ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
 if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
 
+from types import SimpleNamespace as NS
 from typing import List, Dict
 from agent import ReActAgent, AgentConfig, LLM
 
@@ -32,3 +33,70 @@ def test_loop_two_tool_calls_then_final(tmp_path):
     agent = ReActAgent(llm=MockLLM(outputs), config=AgentConfig(max_steps=5))
     answer = agent.run("What is 12*8? Then add 10.")
     assert answer.strip() == "106"
+
+
+def test_parse_json_block_ignores_trailing_prose():
+    raw = ('Sure! {"thought":"t","action":{"tool":"calculator","input":{"expression":"1+1"}}}'
+           ' Hope this helps {or not}.')
+    obj = ReActAgent._parse_json_block(raw)
+    assert obj["action"]["input"] == {"expression": "1+1"}
+
+
+def test_parse_json_block_handles_braces_and_escapes_in_strings():
+    raw = 'x {not json} {"thought":"say \\"}\\" ok","final":"{done}"} tail }'
+    assert ReActAgent._parse_json_block(raw) == {"thought": 'say "}" ok', "final": "{done}"}
+
+
+class FakeStream:
+    def __init__(self, pieces: List[str], consumed: List[str]):
+        self.pieces, self.consumed, self.closed = pieces, consumed, False
+    def __iter__(self):
+        for p in self.pieces:
+            self.consumed.append(p)
+            yield NS(choices=[NS(delta=NS(content=p))])
+    def close(self):
+        self.closed = True
+
+
+def _fake_chat(monkeypatch, make_stream):
+    from agent import OpenAIChat
+    monkeypatch.setenv("OPENAI_API_KEY", "dummy")
+    chat = OpenAIChat(model="m")
+    chat.client = NS(chat=NS(completions=NS(create=lambda **kw: make_stream())))
+    return chat
+
+
+def test_openai_chat_stops_streaming_after_json_object(monkeypatch):
+    pieces = ['{"thought":"x", "final":', ' "a}b"', '}', "\n\nextra", " tokens"]
+    consumed: List[str] = []
+    stream = FakeStream(pieces, consumed)
+    chat = _fake_chat(monkeypatch, lambda: stream)
+
+    assert chat.complete([]) == '{"thought":"x", "final": "a}b"}'
+    assert consumed == pieces[:3] and stream.closed
+
+
+def test_openai_chat_caches_identical_prompts(monkeypatch):
+    calls: List[int] = []
+    def make_stream():
+        calls.append(1)
+        return FakeStream(['{"final":"ok"}'], [])
+    chat = _fake_chat(monkeypatch, make_stream)
+
+    msgs = [{"role": "user", "content": "hi"}]
+    assert chat.complete(msgs) == chat.complete(list(msgs)) == '{"final":"ok"}'
+    chat.complete([{"role": "user", "content": "other"}])
+    assert len(calls) == 2
+
+
+def test_verbose_trace_stays_with_its_agent(capsys):
+    import logging
+
+    outputs = ['{"thought":"t","final":"ok"}']
+    shared = logging.getLogger("react")
+    before = (shared.level, list(shared.handlers), shared.propagate)
+    assert ReActAgent(llm=MockLLM(outputs), config=AgentConfig(verbose=True)).run("q") == "ok"
+    assert "[react] final=ok" in capsys.readouterr().out
+    assert (shared.level, list(shared.handlers), shared.propagate) == before
+    assert ReActAgent(llm=MockLLM(outputs), config=AgentConfig(verbose=False)).run("q") == "ok"
+    assert "[react]" not in capsys.readouterr().out
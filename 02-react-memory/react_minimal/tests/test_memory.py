@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os, sys
+TEST_DIR = os.path.dirname(__file__)
+ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
+if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
+
+from memory import ShortTermMemory, LongTermMemory
+
+
+def test_scratchpad_renders_steps_in_order():
+    mem = ShortTermMemory()
+    mem.add("need math", action={"tool": "calculator", "input": {"expression": "2+2"}}, observation="4")
+    mem.add("done")
+    assert mem.to_scratchpad() == (
+        "Step 1:\n  THOUGHT: need math\n"
+        '  ACTION: {"tool":"calculator","input":{"expression":"2+2"}}\n'
+        "  OBSERVATION: 4\n"
+        "Step 2:\n  THOUGHT: done"
+    )
+
+
+def test_long_term_memory_replays_and_compacts(tmp_path):
+    path = tmp_path / "m.jsonl"
+    mem = LongTermMemory(path=path)
+    for i in range(100):
+        mem.set("k", f"v{i}")
+    mem.set("other", "x")
+    mem.close()
+    # compaction keeps the log bounded while preserving the latest values
+    assert len(path.read_text(encoding="utf-8").splitlines()) < 100
+    reloaded = LongTermMemory(path=path)
+    assert reloaded.get("k") == "v99"
+    assert reloaded.get("other") == "x"
+
+
+def test_scratchpad_serializes_big_integers():
+    mem = ShortTermMemory()
+    mem.add("big", action={"tool": "calculator", "input": {"n": 2**70}})
+    assert mem.to_scratchpad().endswith('ACTION: {"tool":"calculator","input":{"n":1180591620717411303424}}')
+
+
+def test_short_term_memory_trace_view():
+    mem = ShortTermMemory()
+    mem.add("t1", action={"tool": "time_now", "input": {}}, observation="now")
+    mem.add("t2")
+    assert mem.trace == [
+        {"thought": "t1", "action": {"tool": "time_now", "input": {}}, "observation": "now"},
+        {"thought": "t2", "action": None, "observation": None},
+    ]
+
+
+def test_long_term_memory_skips_torn_line(tmp_path, caplog):
+    path = tmp_path / "m.jsonl"
+    path.write_text('{"a":"1"}\n{"b":"2"}\n{"c":"3', encoding="utf-8")
+    mem = LongTermMemory(path=path)
+    assert (mem.get("a"), mem.get("b"), mem.get("c")) == ("1", "2", None)
+    assert "skipping unreadable memory line" in caplog.text
+    # the next write drops the torn tail instead of appending after it
+    mem.set("d", "4")
+    mem.close()
+    reloaded = LongTermMemory(path=path)
+    assert (reloaded.get("a"), reloaded.get("b"), reloaded.get("d")) == ("1", "2", "4")
+
+
+def test_long_term_memory_skips_line_torn_inside_a_character(tmp_path, caplog):
+    path = tmp_path / "m.jsonl"
+    path.write_bytes('{"a":"1"}\n{"b":"سلام"}\n'.encode("utf-8") + '{"c":"س'.encode("utf-8")[:-1])
+    mem = LongTermMemory(path=path)
+    assert (mem.get("a"), mem.get("b"), mem.get("c")) == ("1", "سلام", None)
+    assert "skipping unreadable memory line" in caplog.text
+    mem.set("d", "4")
+    mem.close()
+    assert LongTermMemory(path=path).get("d") == "4"
+
+
+def test_long_term_memory_reads_legacy_json(tmp_path):
+    (tmp_path / "memory.json").write_text('{\n  "k": "old"\n}', encoding="utf-8")
+    path = tmp_path / "memory.jsonl"
+    mem = LongTermMemory(path=path)
+    assert mem.get("k") == "old"
+    mem.set("n", "new")
+    mem.close()
+    reloaded = LongTermMemory(path=path)
+    assert (reloaded.get("k"), reloaded.get("n")) == ("old", "new")
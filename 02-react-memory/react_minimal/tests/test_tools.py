@@ -35,3 +35,88 @@ def test_time_now():
     reg = build_tool_registry(mem)
     out = call_tool(reg, "time_now", {})
     assert "T" in out or ":" in out
+
+
+def test_calculator_compile_is_cached():
+    from tools import _compile
+    _compile.cache_clear()
+    assert safe_calculate("6*7") == "42"
+    assert safe_calculate("6*7") == "42"
+    assert _compile.cache_info().hits == 1
+    # Errors are not cached and still surface as strings
+    assert safe_calculate("1/0").startswith("CALC_ERROR")
+
+
+def test_registry_shares_stateless_tools(tmp_path):
+    a = build_tool_registry(LongTermMemory(path=tmp_path / "a.json"))
+    b = build_tool_registry(LongTermMemory(path=tmp_path / "b.json"))
+    assert list(a) == ["calculator", "time_now", "notes_write", "notes_read"]
+    assert a["calculator"] is b["calculator"]
+    assert a["notes_read"] is not b["notes_read"]
+    call_tool(a, "notes_write", {"key": "k", "text": "from a"})
+    assert call_tool(b, "notes_read", {"key": "k"}) == ""
+
+
+def test_call_tool_reports_first_missing_field(tmp_path):
+    reg = build_tool_registry(LongTermMemory(path=tmp_path / "m.json"))
+    assert reg["notes_write"].required == {"key", "text"}
+    assert not reg["time_now"].required
+    assert call_tool(reg, "notes_write", {}) == "TOOL_ERROR: Missing required field 'key'"
+    assert call_tool(reg, "notes_write", {"key": "k"}) == "TOOL_ERROR: Missing required field 'text'"
+
+
+def test_call_tool_rejects_non_object_input(tmp_path):
+    reg = build_tool_registry(LongTermMemory(path=tmp_path / "m.json"))
+    assert call_tool(reg, "calculator", "2+2") == "TOOL_ERROR: Tool input must be a JSON object, got str"
+    assert call_tool(reg, "time_now", []).startswith("TOOL_ERROR: Tool input must be a JSON object")
+
+
+def test_calculator_rejects_non_numeric_constants():
+    assert "Unsupported" in safe_calculate("'a' * 3")
+    assert "Unsupported" in safe_calculate("True + 1")
+    assert "Unsupported" in safe_calculate("1 | 2")
+
+
+def test_calculator_handles_long_chains_without_recursion():
+    # Deeper than the default recursion limit once turned into nested nodes
+    assert safe_calculate("+".join(["1"] * 2000)) == "2000"
+    assert safe_calculate("2**3**2") == "512"
+    assert safe_calculate("10-4-3") == "3"
+
+
+def test_calculator_prescreen_rejects_before_parsing():
+    from tools import _compile
+    _compile.cache_clear()
+    assert "Unsupported" in safe_calculate("[1, 2]")
+    assert "Unsupported" in safe_calculate("x + 1")
+    assert _compile.cache_info().misses == 0
+    assert safe_calculate("1e3 + 1_000") == "2000.0"
+
+
+def test_calculator_compiled_code_rejects_names_and_attributes():
+    from tools import _compile
+    # Straight to the validator, past the character prescreen
+    for expr in ("__import__('os')", "x + 1", "(1).real", "abs(-1)", "().__class__"):
+        with pytest.raises(ValueError, match="Unsupported"):
+            _compile(expr)
+    assert _compile("2**10")() == 1024
+    assert _compile("7 // 2 + 7 % 2 - -1")() == 5
+    assert _compile("1.5 * 4 / 3")() == 2.0
+
+
+def test_tool_summaries_cached_per_registry(tmp_path):
+    from tools import _render_summaries, tool_summaries
+    reg = build_tool_registry(LongTermMemory(path=tmp_path / "m.json"))
+    _render_summaries.cache_clear()
+    first = tool_summaries(reg)
+    assert tool_summaries(reg) is first
+    assert first.splitlines()[0].startswith("- calculator: Evaluate")
+    assert _render_summaries.cache_info().hits == 1
+
+
+def test_custom_tool_gets_required_from_schema():
+    from tools import Tool
+    t = Tool("echo", "Echo text", {"type": "object", "required": ["text"]}, lambda *, text: text)
+    assert t.required == {"text"}
+    assert call_tool({"echo": t}, "echo", {}) == "TOOL_ERROR: Missing required field 'text'"
+    assert call_tool({"echo": t}, "echo", {"text": "hi"}) == "hi"
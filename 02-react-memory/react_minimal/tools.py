@@ -4,14 +4,17 @@ Section 2 — Tooling Layer (safe calculator, time, notes, registry)
 OVERVIEW
 --------
 Implements a minimal set of tools that the ReAct agent can call:
-- Safe calculator         : Evaluates arithmetic expressions via AST (no eval).
+- Safe calculator         : Evaluates arithmetic expressions after an AST whitelist.
 - time_now                : Returns current local time in ISO-8601 format.
 - notes_write / notes_read: Tiny long-term memory over a JSON file.
 
 Also defines:
-- Tool dataclass          : name, description, JSON-ish schema, call function.
+- Tool dataclass          : name, description, JSON-ish schema, call function
+                            (slotted, frozen; `required` derived from schema).
 - build_tool_registry     : returns a registry dict[str, Tool] bound to a
-                            LongTermMemory instance.
+                            LongTermMemory instance. Tool specs live in the
+                            module-level `_TOOL_SPECS`; stateless tools are
+                            shared singletons, only the notes tools are bound.
 - call_tool               : validates payloads and executes a tool, returning
                             string results or TOOL_ERROR messages.
 
@@ -24,8 +27,16 @@ allows a whitelist of node types:
 - Parentheses are implicit in AST structure.
 
 Any names, calls, attributes, comprehensions, etc. are rejected with a clean
-error message (returned as a string "CALC_ERROR: ..."). This design avoids
-`eval` and keeps the tool secure and deterministic.
+error message (returned as a string "CALC_ERROR: ..."). A character-class
+regex rejects most such inputs before they ever reach `ast.parse`.
+
+Validation flattens the tree (iteratively, no recursion) into a postorder
+program of pre-bound operator steps. A tree that passes is handed to
+`compile()`: its bytecode holds nothing but constants and arithmetic, so it
+runs through `eval` with empty builtins. Trees too deep for the compiler run
+through the flat program's stack loop instead. The result is memoized per
+expression string (`_compile`, LRU of 512), so repeated calculations skip
+parsing, validation and compilation.
 
 NOTES (LONG-TERM MEMORY)
 ------------------------
@@ -36,9 +47,10 @@ REGISTRY & VALIDATION
 ---------------------
 - The registry gives the model structured discoverability: tool name, a brief
   description, and a JSON-schema-like `schema` describing required keys.
-- `call_tool` enforces presence of required fields and returns errors as strings
-  prefixed by "TOOL_ERROR: ..." rather than raising exceptions. This lets the
-  model self-correct in the next step.
+- `call_tool` enforces presence of required fields (a set difference against
+  the `Tool.required` frozenset precomputed from the schema) and returns
+  errors as strings prefixed by "TOOL_ERROR: ..." rather than raising
+  exceptions. This lets the model self-correct in the next step.
 
 EXTENSIONS
 ----------
@@ -49,9 +61,10 @@ EXTENSIONS
 
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Callable, Dict
-import ast, operator as op
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+import ast, operator as op, re
 from datetime import datetime
 
 from memory import LongTermMemory
@@ -64,25 +77,108 @@ _ALLOWED_BINOP = {
 }
 _ALLOWED_UNARY = {ast.UAdd: op.pos, ast.USub: op.neg}
 
+# Cheap pre-screen before ast.parse: digits, operators, parentheses, and the
+# e/j/_ that appear in numeric literals (1e3, 2j, 1_000). Anything else
+# (names, quotes, brackets, commas...) can never pass the AST whitelist.
+_CALC_CHARS = re.compile(r"[\d\s+\-*/%().eEjJ_]+")
+
+
+def _unsupported() -> ValueError:
+    return ValueError("Unsupported expression for calculator")
+
+
+# A compiled expression is a postorder program of (fn, arg) steps:
+# (None, value) pushes a number, (fn, 1) / (fn, 2) pop one / two operands.
+_Program = Tuple[Tuple[Optional[Callable[..., Any]], Any], ...]
+
+
+def _emit_constant(node: ast.Constant, out: List[Any]) -> Tuple[ast.AST, ...]:
+    value = node.value
+    if type(value) not in (int, float, complex):  # exact: rejects bool and str
+        raise _unsupported()
+    out.append((None, value))
+    return ()
+
+
+def _emit_binop(node: ast.BinOp, out: List[Any]) -> Tuple[ast.AST, ...]:
+    fn = _ALLOWED_BINOP.get(type(node.op))
+    if fn is None:
+        raise _unsupported()
+    out.append((fn, 2))
+    return (node.left, node.right)
+
+
+def _emit_unary(node: ast.UnaryOp, out: List[Any]) -> Tuple[ast.AST, ...]:
+    fn = _ALLOWED_UNARY.get(type(node.op))
+    if fn is None:
+        raise _unsupported()
+    out.append((fn, 1))
+    return (node.operand,)
+
+
+# One dict lookup per node instead of an isinstance chain. Parentheses are
+# represented implicitly by AST structure; any other node type is rejected.
+_EMITTERS: Dict[type, Callable[[Any, List[Any]], Tuple[ast.AST, ...]]] = {
+    ast.Constant: _emit_constant,
+    ast.BinOp: _emit_binop,
+    ast.UnaryOp: _emit_unary,
+}
+
+
+def _flatten(tree: ast.Expression) -> _Program:
+    # Validate every node and lay the tree out in postorder without recursion:
+    # emitting node-right-left from a stack and reversing gives left-right-node.
+    out: List[Any] = []
+    stack: List[ast.AST] = [tree.body]
+    while stack:
+        node = stack.pop()
+        emit = _EMITTERS.get(type(node))
+        if emit is None:
+            raise _unsupported()
+        stack.extend(emit(node, out))
+    out.reverse()
+    return tuple(out)
+
 
-def _eval_ast(node: ast.AST) -> float:
-    if isinstance(node, ast.Expression):
-        return _eval_ast(node.body)
-    if isinstance(node, ast.Num):  # type: ignore[attr-defined]
-        return node.n  # type: ignore[no-any-return]
-    if isinstance(node, ast.BinOp) and type(node.op) in _ALLOWED_BINOP:
-        return _ALLOWED_BINOP[type(node.op)](_eval_ast(node.left), _eval_ast(node.right))
-    if isinstance(node, ast.UnaryOp) and type(node.op) in _ALLOWED_UNARY:
-        return _ALLOWED_UNARY[type(node.op)](_eval_ast(node.operand))
-    # Parentheses are represented implicitly by AST structure
-    raise ValueError("Unsupported expression for calculator")
+def _run(program: _Program) -> float:
+    stack: List[Any] = []
+    push, pop = stack.append, stack.pop
+    for fn, arg in program:
+        if fn is None:
+            push(arg)
+        elif arg == 1:
+            push(fn(pop()))
+        else:
+            right = pop()
+            push(fn(pop(), right))
+    return stack[0]
+
+
+# Globals for evaluating validated code: no builtins, nothing to look up.
+_NO_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+
+
+@lru_cache(maxsize=512)
+def _compile(expression: str) -> Callable[[], float]:
+    # Parse + validate once per distinct expression; agents repeat them a lot.
+    tree = ast.parse(expression, mode="eval")
+    program = _flatten(tree)
+    # The validated tree holds only numbers and arithmetic operators, so its
+    # bytecode can't reach names, attributes or calls: let CPython's eval loop
+    # run it. compile() recurses per nesting level, so very long chains fall
+    # back to the flat program.
+    try:
+        code = compile(tree, "<calc>", "eval")
+    except RecursionError:
+        return partial(_run, program)
+    return partial(eval, code, _NO_GLOBALS, {})
 
 
 def safe_calculate(expression: str) -> str:
+    if not _CALC_CHARS.fullmatch(expression):
+        return f"CALC_ERROR: {_unsupported()}"
     try:
-        tree = ast.parse(expression, mode="eval")
-        result = _eval_ast(tree)
-        return str(result)
+        return str(_compile(expression)())
     except Exception as e:  # pragma: no cover
         return f"CALC_ERROR: {e}"
 
@@ -102,58 +198,87 @@ def notes_read(mem: LongTermMemory, key: str) -> str:
 
 # ------------------ Tool registry ------------------
 
-@dataclass
+@dataclass(slots=True, frozen=True, eq=False)  # identity eq/hash: usable as a cache key
 class Tool:
     name: str
     description: str
     schema: Dict[str, Any]  # JSON schema-like dict for human/model guidance
     func: Callable[..., str]
+    # Derived from schema["required"] so call_tool validates with one set op
+    required: FrozenSet[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "required", frozenset(self.schema.get("required", ())))
+
+
+def _calculator(*, expression: str) -> str:
+    return safe_calculate(expression)
+
+
+def _time_now(**_: Any) -> str:
+    return time_now()
+
+
+# (name, description, schema, func, binds_mem) — funcs with binds_mem=True take
+# the LongTermMemory as their first positional argument.
+_TOOL_SPECS = (
+    ("calculator",
+     "Evaluate a safe arithmetic expression (no variables or functions).",
+     {"type": "object", "properties": {"expression": {"type": "string"}}, "required": ["expression"]},
+     _calculator, False),
+    ("time_now",
+     "Return the current local time as ISO8601.",
+     {"type": "object", "properties": {}},
+     _time_now, False),
+    ("notes_write",
+     "Write a note string under a key to long-term memory.",
+     {"type": "object", "properties": {"key": {"type": "string"}, "text": {"type": "string"}}, "required": ["key", "text"]},
+     notes_write, True),
+    ("notes_read",
+     "Read the note under a key from long-term memory (empty if missing).",
+     {"type": "object", "properties": {"key": {"type": "string"}}, "required": ["key"]},
+     notes_read, True),
+)
+
+# Stateless tools are built once and shared by every registry.
+_SHARED_TOOLS = {
+    name: Tool(name, description, schema, func)
+    for name, description, schema, func, binds_mem in _TOOL_SPECS
+    if not binds_mem
+}
 
 
 def build_tool_registry(mem: LongTermMemory) -> Dict[str, Tool]:
     return {
-        "calculator": Tool(
-            name="calculator",
-            description="Evaluate a safe arithmetic expression (no variables or functions).",
-            schema={"type": "object", "properties": {"expression": {"type": "string"}}, "required": ["expression"]},
-            func=lambda *, expression: safe_calculate(expression),
-        ),
-        "time_now": Tool(
-            name="time_now",
-            description="Return the current local time as ISO8601.",
-            schema={"type": "object", "properties": {}},
-            func=lambda **_: time_now(),
-        ),
-        "notes_write": Tool(
-            name="notes_write",
-            description="Write a note string under a key to long-term memory.",
-            schema={"type": "object", "properties": {"key": {"type": "string"}, "text": {"type": "string"}}, "required": ["key", "text"]},
-            func=lambda *, key, text: notes_write(mem, key, text),
-        ),
-        "notes_read": Tool(
-            name="notes_read",
-            description="Read the note under a key from long-term memory (empty if missing).",
-            schema={"type": "object", "properties": {"key": {"type": "string"}}, "required": ["key"]},
-            func=lambda *, key: notes_read(mem, key),
-        ),
+        name: (Tool(name, description, schema, partial(func, mem)) if binds_mem
+               else _SHARED_TOOLS[name])
+        for name, description, schema, func, binds_mem in _TOOL_SPECS
     }
 
 
+@lru_cache(maxsize=8)
+def _render_summaries(tools: Tuple[Tool, ...]) -> str:
+    return "\n".join(f"- {t.name}: {t.description}. Input schema: {t.schema}" for t in tools)
+
+
 def tool_summaries(reg: Dict[str, Tool]) -> str:
-    lines = []
-    for t in reg.values():
-        lines.append(f"- {t.name}: {t.description}. Input schema: {t.schema}")
-    return "\n".join(lines)
+    # Keyed on the Tool objects themselves, so a registry renders once and a
+    # recycled id() can never serve a stale prompt.
+    return _render_summaries(tuple(reg.values()))
 
 
 def call_tool(reg: Dict[str, Tool], name: str, payload: Dict[str, Any]) -> str:
     tool = reg.get(name)
     if not tool:
         return f"TOOL_ERROR: Unknown tool '{name}'"
+    if not isinstance(payload, dict):
+        return f"TOOL_ERROR: Tool input must be a JSON object, got {type(payload).__name__}"
     # Simple schema validation (keys only)
-    required = tool.schema.get("required", [])
-    for key in required:
-        if key not in payload:
+    if tool.required:
+        missing = tool.required - payload.keys()
+        if missing:
+            # Report in schema order so the message is deterministic
+            key = next(k for k in tool.schema["required"] if k in missing)
             return f"TOOL_ERROR: Missing required field '{key}'"
     try:
         return tool.func(**payload)
@@ -19,6 +19,12 @@ ENV VARS
 - `MODEL`                  : optional (default: `gpt-4o-mini`)
 - `OPENAI_BASE_URL`/`OPENAI_API_BASE` : optional router base (e.g., MetisAI)
 
+IMPORTS
+-------
+LangChain (langchain, langchain-openai, langchain-core) is imported inside
+`build_llm` / `build_agent`, so `runner.py --help` and tool-only imports
+don't pay its start-up cost.
+
 HOW TRACING WORKS
 -----------------
 Set `verbose=True` on the executor (or pass `--verbose` via CLI). LangChain will
@@ -32,17 +38,18 @@ EXTENSIONS
 
 from __future__ import annotations
 import os
-from typing import List
+from functools import lru_cache
+from typing import TYPE_CHECKING, List
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-
 from tools_tsetmc_lc import build_tools
 
+if TYPE_CHECKING:  # LangChain is imported inside build_llm/build_agent
+    from langchain_openai import ChatOpenAI
+    from langchain.agents import AgentExecutor
+
 
 def build_llm(model: str | None = None, base_url: str | None = None) -> ChatOpenAI:
     """Create a ChatOpenAI LLM with optional router base URL support.
@@ -50,6 +57,8 @@ def build_llm(model: str | None = None, base_url: str | None = None) -> ChatOpen
     We explicitly pass `api_key` (from env) and `base_url` so the OpenAI SDK
     never misses credentials even if environment loaders weren't triggered elsewhere.
     """
+    from langchain_openai import ChatOpenAI
+
     model = model or os.getenv("MODEL", "gpt-4o-mini")
     base_url = base_url or os.getenv("OPENAI_BASE_URL")
     api_key = os.getenv("OPENAI_API_KEY")
@@ -64,6 +73,9 @@ def build_agent(
     max_steps: int = 6,
     verbose: bool = False,
 ) -> AgentExecutor:
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
     tools = build_tools()
     llm = build_llm(model=model, base_url=base_url)
 
@@ -95,6 +107,13 @@ def build_agent(
     return executor
 
 
+@lru_cache(maxsize=8)
+def _cached_build_agent(
+    model: str | None, base_url: str | None, max_steps: int, verbose: bool
+) -> AgentExecutor:
+    return build_agent(model=model, base_url=base_url, max_steps=max_steps, verbose=verbose)
+
+
 def run_query(
     query: str,
     *,
@@ -102,8 +121,18 @@ def run_query(
     base_url: str | None = None,
     max_steps: int = 6,
     verbose: bool = False,
+    rebuild: bool = False,
 ) -> str:
-    agent = build_agent(model=model, base_url=base_url, max_steps=max_steps, verbose=verbose)
+    """Run one query and return the agent's final answer.
+
+    Executors are reused per (model, base_url, max_steps, verbose); pass
+    `rebuild=True` to build a fresh one, e.g. after changing OPENAI_API_KEY
+    or MODEL in the environment.
+    """
+    if rebuild:
+        agent = build_agent(model=model, base_url=base_url, max_steps=max_steps, verbose=verbose)
+    else:
+        agent = _cached_build_agent(model, base_url, max_steps, verbose)
     result = agent.invoke({"input": query})
     # AgentExecutor returns a dict with an "output" key
     return str(result.get("output", ""))
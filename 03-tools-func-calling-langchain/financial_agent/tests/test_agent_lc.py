@@ -15,3 +15,27 @@ def test_build_agent_constructs_executor(monkeypatch):
     executor = build_agent(max_steps=2, verbose=False)
     # We don't invoke the agent (would require a live model). Construction should succeed.
     assert hasattr(executor, "invoke")
+
+
+def test_run_query_reuses_executor(monkeypatch):
+    import agent_lc
+
+    built = []
+
+    class FakeExecutor:
+        def invoke(self, inputs):
+            return {"output": "echo: " + inputs["input"]}
+
+    def fake_build_agent(**kwargs):
+        built.append(kwargs)
+        return FakeExecutor()
+
+    monkeypatch.setattr(agent_lc, "build_agent", fake_build_agent)
+    agent_lc._cached_build_agent.cache_clear()
+
+    assert agent_lc.run_query("hi") == "echo: hi"
+    assert agent_lc.run_query("again") == "echo: again"
+    assert len(built) == 1
+    agent_lc.run_query("fresh", rebuild=True)
+    assert len(built) == 2
+    agent_lc._cached_build_agent.cache_clear()
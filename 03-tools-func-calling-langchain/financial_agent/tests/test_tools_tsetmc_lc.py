@@ -87,4 +87,75 @@ def test_get_time_tool():
     out = mod._get_time(mod._GetTimeArgs())
     data = json.loads(out)
     assert data["type"] == "TIME"
-    assert "iso" in data
\ No newline at end of file
+    assert "iso" in data
+
+def test_all_symbols_fetched_once_within_ttl(monkeypatch):
+    monkeypatch.setenv("BRSAPI_KEY", "dummy")
+    import importlib
+    importlib.reload(mod)
+
+    calls = []
+
+    def fake_get(path, params):
+        calls.append(path)
+        return [
+            {"code_4": "IKCO", "code_5": "IKCO1", "isin": "IR1234567890", "l18": "خودرو"},
+            {"code_4": "FOLD", "code_5": "FOLD1", "isin": "IR0000000001", "l18": "فولاد"},
+        ], None
+
+    monkeypatch.setattr(mod, "_get", fake_get)
+
+    assert mod._resolve_l18("ikco1") == ("خودرو", None)
+    assert mod._resolve_l18("IR0000000001") == ("فولاد", None)
+    assert mod._resolve_l18("NOPE")[0] is None
+    assert calls == ["AllSymbols.php"]
+
+    # Once the TTL has elapsed the list is refetched
+    monkeypatch.setattr(mod, "_symbols_cache", (0.0, {}))
+    assert mod._resolve_l18("FOLD") == ("فولاد", None)
+    assert len(calls) == 2
+
+
+def test_get_uses_shared_session(monkeypatch):
+    monkeypatch.setenv("BRSAPI_KEY", "dummy")
+    import importlib
+    importlib.reload(mod)
+
+    seen = {}
+
+    def fake_session_get(url, params=None, timeout=None):
+        seen.update(url=url, params=params, timeout=timeout)
+        return types.SimpleNamespace(status_code=200, content=b'{"ok": true}', text='{"ok": true}')
+
+    assert mod._SESSION is None  # created lazily on first use
+    session = mod._session()
+    assert mod._session() is session
+    monkeypatch.setattr(session, "get", fake_session_get)
+    assert mod._get("Symbol.php", {"l18": "خودرو"}) == ({"ok": True}, None)
+    assert seen["url"].endswith("/Symbol.php")
+    assert seen["params"] == {"key": "dummy", "l18": "خودرو"}
+    assert session.headers["Accept"] == mod.DEFAULT_HEADERS["Accept"]
+
+
+def test_json_keeps_persian_text_readable():
+    out = mod._json({"symbol_l18": "خودرو", "big": 2**70})
+    assert "خودرو" in out
+    assert json.loads(out) == {"symbol_l18": "خودرو", "big": 2**70}
+
+
+def test_quote_args_are_strict_strings():
+    assert mod._GetQuoteArgs(symbol="IKCO").price_field == "pc"
+    with pytest.raises(Exception):
+        mod._GetQuoteArgs(symbol=1234)
+
+
+def test_get_falls_back_to_text_when_bytes_do_not_parse(monkeypatch):
+    monkeypatch.setenv("BRSAPI_KEY", "dummy")
+    import importlib
+    importlib.reload(mod)
+
+    # e.g. a UTF-8 BOM, which orjson rejects but json.loads(text) tolerates after decoding
+    body = '\ufeff[{"l18": "خودرو"}]'
+    resp = types.SimpleNamespace(status_code=200, content=body.encode("utf-8"), text=body.lstrip("\ufeff"))
+    monkeypatch.setattr(mod._session(), "get", lambda url, params=None, timeout=None: resp)
+    assert mod._get("AllSymbols.php", {"type": 1}) == ([{"l18": "خودرو"}], None)
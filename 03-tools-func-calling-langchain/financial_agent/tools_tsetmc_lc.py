@@ -16,19 +16,36 @@ SAFETY
 ------
 - All network/parse issues become JSON with `type: "TOOL_ERROR" | "DATA_ERROR"`.
 - No exceptions escape to the agent layer.
+
+IMPORTS
+-------
+`requests` and `langchain_core` are imported lazily (first HTTP call and
+`build_tools()` respectively), so importing this module to call a tool
+function directly stays cheap.
+
+SYMBOL RESOLUTION
+-----------------
+Latin codes/ISINs are resolved to Persian l18 names through `AllSymbols.php`.
+The response is fetched once, turned into a dict keyed by the upper-cased
+code_4/code_5/isin/l18, and reused for `SYMBOLS_TTL` seconds, so each lookup
+is a single dict hit instead of a download plus a linear scan.
 """
 
 from __future__ import annotations
-from typing import Any, Dict, Optional, Tuple, Literal, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Literal, List
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import json
 import os
+import time
 import unicodedata
 
-import requests
 from pydantic import BaseModel, Field
-from langchain_core.tools import StructuredTool
+
+if TYPE_CHECKING:  # heavy imports are deferred to first use (see _session/build_tools)
+    import requests
+    from langchain_core.tools import StructuredTool
 
 # ------------------ Config ------------------
 
@@ -43,26 +60,69 @@ DEFAULT_HEADERS = {
     "Accept": "application/json, text/plain, */*",
 }
 
+# One keep-alive session for all BrsApi calls: repeated quotes reuse the
+# TCP/TLS connection instead of paying a fresh handshake each time. Created
+# (and `requests` imported) on the first network call.
+_SESSION: Optional["requests.Session"] = None
+
+# AllSymbols.php is large and rarely changes: keep one parsed index per process.
+SYMBOLS_TTL = 3600.0  # seconds
+_symbols_cache: Optional[Tuple[float, Dict[str, str]]] = None  # (expires_at, index)
+
 # ------------------ Helpers ------------------
 
-def _json(obj: Dict[str, Any]) -> str:
-    return json.dumps(obj, ensure_ascii=False)
+try:  # optional C serializer; writes UTF-8 directly, like ensure_ascii=False
+    import orjson
+
+    def _json(obj: Dict[str, Any]) -> str:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:  # e.g. ints beyond 64 bits from a quirky payload
+            return json.dumps(obj, ensure_ascii=False)
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    def _json(obj: Dict[str, Any]) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _loads = json.loads  # also accepts bytes
 
 
 def _need_key() -> str:
     return _json({"type": "TOOL_ERROR", "message": "Missing BRSAPI_KEY environment variable"})
 
 
+def _nfc(s: Any) -> str:
+    if not s:
+        return ""
+    if s.__class__ is not str:  # JSON fields are str; tolerate stray numbers
+        s = str(s)
+    return unicodedata.normalize("NFC", s).strip()
+
+
+def _norm_upper(s: Any) -> str:
+    return _nfc(s).upper()
+
+
+@lru_cache(maxsize=4096)
 def _normalize(s: Optional[str]) -> str:
-    return unicodedata.normalize("NFC", s or "").strip()
+    # Cached for user-supplied symbols, which repeat across calls; bulk
+    # AllSymbols rows go through the uncached `_nfc` so they don't evict them.
+    return _nfc(s or "")
 
 
-def _is_ascii(s: str) -> bool:
-    try:
-        s.encode("ascii")
-        return True
-    except Exception:
-        return False
+def _session() -> "requests.Session":
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        s = requests.Session()
+        s.headers.update(DEFAULT_HEADERS)
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _SESSION = s
+    return _SESSION
 
 
 def _get(path: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
@@ -72,11 +132,11 @@ def _get(path: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], O
     q = {"key": BRSAPI_KEY}
     q.update(params)
     try:
-        r = requests.get(url, params=q, headers=DEFAULT_HEADERS, timeout=10)
+        r = _session().get(url, params=q, timeout=10)
         if r.status_code != 200:
             return None, f"HTTP {r.status_code}"
         try:
-            data = r.json()
+            data = _loads(r.content)  # parse the raw bytes, no text decode
         except Exception:
             data = json.loads(r.text)
         return data, None
@@ -97,34 +157,67 @@ def _get_time(*_args, **_kwargs) -> str:
 
 
 class _GetQuoteArgs(BaseModel):
-    symbol: str = Field(..., description="TSETMC symbol: Persian l18 (e.g., 'خودرو') or Latin/ISIN")
+    # strict=True: the model always sends a JSON string here, so skip pydantic's
+    # coercion path (and reject e.g. numbers posing as symbols). Literal
+    # fields are already exact-match.
+    symbol: str = Field(
+        ..., strict=True,
+        description="TSETMC symbol: Persian l18 (e.g., 'خودرو') or Latin/ISIN",
+    )
     price_field: Literal["pl", "pc", "py"] = Field(
         "pc", description="Price field: pl (last), pc (close), py (yesterday close)"
     )
 
 
+def _build_symbol_index(data: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Map upper-cased code_4/code_5/isin and l18 to the l18 name.
+
+    Code/ISIN matches take precedence over l18 matches and the first row wins,
+    mirroring the original two-pass scan.
+    """
+    by_code: Dict[str, str] = {}
+    by_l18: Dict[str, str] = {}
+    code_add, l18_add = by_code.setdefault, by_l18.setdefault
+    for item in data:
+        get = item.get
+        l18 = _nfc(get("l18"))
+        for code in (_norm_upper(get("code_4")), _norm_upper(get("code_5")), _norm_upper(get("isin"))):
+            if code:
+                code_add(code, l18)
+        if l18:
+            l18_add(l18.upper(), l18)
+    by_l18.update(by_code)
+    return by_l18
+
+
+def _symbol_index() -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """Return the AllSymbols index, refetching at most once per `SYMBOLS_TTL`."""
+    global _symbols_cache
+    now = time.monotonic()
+    if _symbols_cache is not None and _symbols_cache[0] > now:
+        return _symbols_cache[1], None
+
+    data, err = _get("AllSymbols.php", {"type": 1})
+    if err or not isinstance(data, list):
+        return None, err or "unexpected response"
+    index = _build_symbol_index(data)
+    _symbols_cache = (now + SYMBOLS_TTL, index)
+    return index, None
+
+
 def _resolve_l18(symbol: str) -> Tuple[Optional[str], Optional[str]]:
     sym = _normalize(symbol)
     if not sym:
         return None, "empty symbol"
-    if not _is_ascii(sym):
+    if not sym.isascii():  # Persian l18 names are used as-is
         return sym, None
 
-    data, err = _get("AllSymbols.php", {"type": 1})
-    if err or not isinstance(data, list):
-        return None, err or "unexpected response"
-
+    index, err = _symbol_index()
+    if err:
+        return None, err
     sym_u = sym.upper()
-    for item in data:
-        code4 = _normalize(str(item.get("code_4", ""))).upper()
-        code5 = _normalize(str(item.get("code_5", ""))).upper()
-        isin = _normalize(str(item.get("isin", ""))).upper()
-        l18 = _normalize(str(item.get("l18", "")))
-        if sym_u in (code4, code5, isin):
-            return l18 or None, None
-    for item in data:
-        if _normalize(str(item.get("l18", ""))).upper() == sym_u:
-            return _normalize(str(item.get("l18", ""))), None
+    if sym_u in index:
+        return index[sym_u] or None, None
     return None, f"symbol '{symbol}' not found in AllSymbols"
 
 
@@ -182,6 +275,8 @@ def _get_tsetmc_quote(*args, **kwargs) -> str:
 
 def build_tools() -> List[StructuredTool]:
     """Return a list of LangChain StructuredTool objects ready to bind to the LLM."""
+    from langchain_core.tools import StructuredTool
+
     get_time_tool = StructuredTool.from_function(
         name="get_time",
         description="Return the current local time as ISO-8601 string.",
@@ -0,0 +1,17 @@
+"""
+Entry point for `python -m rag_engine` (run from `04-rag/`); same as
+`python cli.py` from inside this folder.
+
+The engine's modules import each other flat (`from indexer import ...`), so
+this folder is put on `sys.path` first.
+"""
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+from cli import main  # noqa: E402
+
+raise SystemExit(main())
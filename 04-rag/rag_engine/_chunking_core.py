@@ -0,0 +1,97 @@
+"""
+Language-independent chunking core shared by `en/chunking.py` and
+`fa/chunking.py`: a regex sentence splitter, word-bounded grouping of
+sentences with overlap, and a page-streaming sentence iterator parameterized
+by the language's splitter.
+"""
+
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, List, Pattern
+
+
+def _split_on(pattern: Pattern[str], text: str) -> List[str]:
+    """Split at `pattern` matches (group 1 = terminator, group 2 = the
+    whitespace after it) in a single scan."""
+    text = (text or "").strip()
+    if not text:
+        return []
+    # Slices never need stripping: `text` is stripped and each match consumes
+    # the whitespace after its terminator, so every piece starts and ends on
+    # a non-space character.
+    sents, start = [], 0
+    add = sents.append
+    for m in pattern.finditer(text):
+        add(text[start:m.end(1)])
+        start = m.end()
+    if start < len(text):
+        add(text[start:])
+    return sents
+
+
+def _iter_chunks(sents: Iterable[str], chunk_size: int, overlap: int) -> Iterator[str]:
+    buf: List[str] = []
+    buf_tokens: List[List[str]] = []  # words of each buf entry, split once
+    word_count = 0
+    # Bound methods hoisted out of the loop; buffers are cleared in place.
+    buf_add, tokens_add = buf.append, buf_tokens.append
+
+    for s in sents:
+        w = s.split()
+        if not w:
+            continue
+        if word_count + len(w) > chunk_size and buf:
+            yield " ".join(buf)
+            # overlap: keep the last `overlap` words
+            tail: List[str] = []
+            if overlap > 0:
+                parts, need = [], overlap
+                for toks in reversed(buf_tokens):
+                    parts.append(toks[-need:])
+                    need -= len(toks)
+                    if need <= 0:
+                        break
+                for part in reversed(parts):
+                    tail.extend(part)
+            buf.clear()
+            buf_tokens.clear()
+            if tail:
+                buf_add(" ".join(tail))
+                tokens_add(tail)
+            word_count = len(tail)
+        buf_add(s)
+        tokens_add(w)
+        word_count += len(w)
+    if buf:
+        yield " ".join(buf)
+
+
+def _group_words(sents: List[str], chunk_size: int, overlap: int) -> List[str]:
+    return list(_iter_chunks(sents, chunk_size, overlap))
+
+
+def _iter_sentences(pages: Iterable[str], split: Callable[[str], List[str]]) -> Iterator[str]:
+    # A page's last sentence may continue on the next page: carry it over and
+    # re-split it together with the next page, as if the pages were joined.
+    # Only the carry's newest part is re-split: while pages bring no sentence
+    # end, the older parts are settled into `head`, so a long run of such
+    # pages costs O(page) each instead of O(carry).
+    head: List[str] = []
+    carry = ""
+    for page in pages:
+        sents = split(carry + "\n" + page if carry else page)
+        if not sents:
+            continue
+        if len(sents) == 1 and carry and sents[0].startswith(carry):
+            rest = sents[0][len(carry):]
+            new = rest.lstrip()
+            if new:  # blank pages leave the carry as it was
+                head.append(carry + rest[: len(rest) - len(new)])
+                carry = new
+            continue
+        if head:
+            sents[0] = "".join(head) + sents[0]
+            head.clear()
+        carry = sents.pop()
+        yield from sents
+    if carry:
+        yield "".join(head) + carry
@@ -0,0 +1,39 @@
+"""
+Small helpers shared across the engine (CLI, indexer, QA).
+"""
+
+from __future__ import annotations
+import os
+
+_PDF_MAGIC = b"%PDF-"
+_O_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+
+
+def is_pdf(path: str) -> bool:
+    """True if the file starts with the PDF magic bytes; falls back to the
+    `.pdf` extension when the file can't be read."""
+    try:
+        fd = os.open(path, _O_FLAGS)
+    except OSError:
+        return path.lower().endswith(".pdf")
+    try:
+        if hasattr(os, "pread"):
+            head = os.pread(fd, len(_PDF_MAGIC), 0)
+        else:  # Windows
+            head = os.read(fd, len(_PDF_MAGIC))
+    except OSError:
+        return path.lower().endswith(".pdf")
+    finally:
+        os.close(fd)
+    return head == _PDF_MAGIC
+
+
+def preview(text: str, n: int = 120) -> str:
+    """Whitespace-collapsed first `n` characters of `text` (with "…" if cut)."""
+    # Collapse only a bounded prefix: once it yields more than n characters the
+    # rest of the text can't change the result. Mostly-whitespace prefixes fall
+    # through to the full pass.
+    t = " ".join(text[: 2 * n].split())
+    if len(t) <= n and len(text) > 2 * n:
+        t = " ".join(text.split())
+    return (t[: n] + "…") if len(t) > n else t
@@ -3,7 +3,11 @@ Language-dispatching facade for text chunking.
 
 This module keeps the public function `chunk_text(...)` stable while routing
 to language-specific implementations in `rag_engine/en/chunking.py` and
-`rag_engine/fa/chunking.py`.
+`rag_engine/fa/chunking.py`. The two stages are also exposed separately:
+`split_sentences(...)` (language-aware) and `make_chunks(...)` (word-bounded
+grouping with overlap; each sentence is tokenized exactly once).
+`chunk_pages(...)` streams chunks from an iterable of page texts, so a large
+document never has to be held as one string.
 
 Why this split?
 - Cleaner structure: shared code stays at package root; per-language logic
@@ -13,14 +17,49 @@ Why this split?
 """
 
 from __future__ import annotations
-from typing import List
+from typing import Iterable, Iterator, List
 
 from en.chunking import chunk_text as _chunk_en
+from en.chunking import chunk_text_stream as _stream_en
+from en.chunking import _sentence_split_en
+from _chunking_core import _group_words
 
 try:
     from fa.chunking import chunk_text as _chunk_fa  # type: ignore
+    from fa.chunking import chunk_text_stream as _stream_fa  # type: ignore
+    from fa.chunking import _sentence_split_fa  # type: ignore
 except Exception:  # pragma: no cover
     _chunk_fa = None  # type: ignore
+    _stream_fa = None  # type: ignore
+    _sentence_split_fa = None  # type: ignore
+
+
+def _is_fa(lang: str) -> bool:
+    return (lang or "en").strip().lower().startswith("fa")
+
+
+def split_sentences(text: str, *, lang: str = "en") -> List[str]:
+    """
+    Split text into stripped, non-empty sentences.
+
+    Args:
+        text: Source text (UTF-8 string).
+        lang: 'en' or 'fa'. Defaults to 'en' on unknown values.
+    """
+    if _is_fa(lang) and _sentence_split_fa is not None:
+        return _sentence_split_fa(text)
+    return _sentence_split_en(text)
+
+
+def make_chunks(sentences: List[str], *, chunk_size: int = 600, overlap: int = 120) -> List[str]:
+    """
+    Group sentences into word-bounded chunks.
+
+    A chunk is flushed before the sentence that would push it past
+    `chunk_size` words; the next chunk starts with the last `overlap` words
+    of the previous one.
+    """
+    return _group_words(sentences, chunk_size, overlap)
 
 
 def chunk_text(
@@ -42,8 +81,27 @@ def chunk_text(
     Returns:
         List[str]: chunked passages.
     """
-    l = (lang or "en").strip().lower()
-    if l.startswith("fa") and _chunk_fa is not None:
+    if _is_fa(lang) and _chunk_fa is not None:
         return _chunk_fa(text, chunk_size=chunk_size, overlap=overlap)
     # Fallback to English implementation if fa not available
     return _chunk_en(text, chunk_size=chunk_size, overlap=overlap)
+
+
+def chunk_pages(
+    pages: Iterable[str],
+    *,
+    lang: str = "en",
+    chunk_size: int = 600,
+    overlap: int = 120,
+) -> Iterator[str]:
+    """
+    Lazily chunk a sequence of page texts.
+
+    Yields the same chunks as `chunk_text("\\n".join(pages), ...)` (up to
+    whitespace inside a sentence that spans two pages), but each chunk is
+    emitted as soon as it is full; sentences and the overlap tail carry
+    across page boundaries.
+    """
+    if _is_fa(lang) and _stream_fa is not None:
+        return _stream_fa(pages, chunk_size=chunk_size, overlap=overlap)
+    return _stream_en(pages, chunk_size=chunk_size, overlap=overlap)
@@ -3,11 +3,18 @@ Section 4 — CLI for the portable RAG engine
 
 OVERVIEW
 --------
-Provides two subcommands:
-- `index` — ingest PDF or text file, build embeddings, and persist `index.pkl`.
+Provides three subcommands:
+- `index` — ingest PDF or text file, build embeddings, and persist the index
+  (a directory by default; a `.pkl` path writes a single pickle).
 - `query` — load an index and answer a question (offline summary or `--llm`).
+  If a `serve` process holds the same index, the question is sent to it
+  instead (skipped with `--verbose`, which traces a local run, and with
+  `--model`/`--base-url`: the server only uses its own LLM settings).
+- `serve` — load an index once and answer queries over a Unix socket.
 
 Router/base URL and model are supported for LLM synthesis (OpenAI-compatible).
+Each subcommand imports only what it uses, so `--help` and queries don't pay
+for pypdf/scikit-learn/openai unless they need them.
 
 VERBOSE MODE
 ------------
@@ -23,26 +30,20 @@ CITATIONS MODE
 from __future__ import annotations
 import argparse
 import os
+from typing import Any, Dict, Iterable, Iterator
 
-from indexer import ingest_pdf, ingest_text_file, build_index, save_index, load_index
-from retriever import search
-from qa import answer_offline, answer_with_llm
+from _util import is_pdf, preview
 
 
-def _looks_like_pdf(path: str) -> bool:
-    if path.lower().endswith(".pdf"):
-        return True
-    try:
-        with open(path, "rb") as f:
-            head = f.read(5)
-        return head.startswith(b"%PDF-")
-    except Exception:
-        return False
-
-
-def _preview(text: str, n: int = 120) -> str:
-    t = " ".join(text.split())
-    return (t[: n] + "…") if len(t) > n else t
+def _counted(pages: Iterable[str], stats: Dict[str, Any], *, words: bool) -> Iterator[str]:
+    # Pass pages through while tallying what the verbose trace reports.
+    for page in pages:
+        stats["chars"] += len(page)
+        if words:  # a full split per page; only worth it for --verbose
+            stats["words"] += len(page.split())
+        if not stats["first"]:
+            stats["first"] = page
+        yield page
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -53,18 +54,22 @@ def build_parser() -> argparse.ArgumentParser:
     pi = sub.add_parser("index", help="Build and save an index from a PDF or text file")
     src = pi.add_mutually_exclusive_group(required=True)
     src.add_argument("--pdf", help="Path to a PDF file to ingest")
-    src.add_argument("--text", help="Path to a plain-text file to ingest (UTF-8 by default)")
+    src.add_argument("--text", help="Path to a plain-text file, or a directory of .txt/.md/.rst/.pdf files, to ingest (UTF-8 by default)")
     pi.add_argument("--encoding", default="utf-8", help="Text file encoding for --text (default: utf-8)")
     pi.add_argument("--lang", default="en", help="Language hint: en | fa")
-    pi.add_argument("--out", required=True, help="Output index path (e.g., ./index.pkl)")
-    pi.add_argument("--emb", default="tfidf", choices=["tfidf", "sbert"], help="Embedding backend")
+    pi.add_argument("--out", required=True, help="Output index directory (e.g., ./index); a .pkl path writes a single pickle")
+    pi.add_argument("--emb", default="tfidf", choices=["tfidf", "hashing", "sbert"],
+                    help="Embedding backend (hashing: vocabulary-free TF-IDF, parallel on big corpora)")
     pi.add_argument("--chunk-size", type=int, default=600)
     pi.add_argument("--chunk-overlap", type=int, default=120)
+    pi.add_argument("--int8", action="store_true", help="Store vectors as int8 with per-row scales (~4x smaller)")
+    pi.add_argument("--ann", default=None, choices=["hnsw", "flat", "sq8"],
+                    help="Also build a FAISS index for search (SBERT only; needs faiss-cpu; sq8 = int8 scan)")
     pi.add_argument("--verbose", action="store_true", help="Print step-by-step indexing trace")
 
     # query
     pq = sub.add_parser("query", help="Load an index and answer a question")
-    pq.add_argument("--index", required=True, help="Path to a saved index .pkl")
+    pq.add_argument("--index", required=True, help="Path to a saved index (directory or .pkl)")
     pq.add_argument("--q", required=True, help="User question")
     pq.add_argument("--top-k", type=int, default=4)
     pq.add_argument("--llm", action="store_true", help="Use OpenAI LLM synthesis if API key available")
@@ -74,6 +79,11 @@ def build_parser() -> argparse.ArgumentParser:
                     help="How to render citations: inline | refs | none (default: refs)")
     pq.add_argument("--verbose", action="store_true", help="Print step-by-step query/answer trace")
 
+    # serve
+    ps = sub.add_parser("serve", help="Keep an index loaded and answer queries over a Unix socket")
+    ps.add_argument("--index", required=True, help="Path to a saved index (directory or .pkl)")
+    ps.add_argument("--verbose", action="store_true", help="Print index (re)loads")
+
     return p
 
 
@@ -81,61 +91,103 @@ def main(argv=None) -> int:
     args = build_parser().parse_args(argv)
 
     if args.cmd == "index":
+        from indexer import iter_path_texts, iter_pdf_pages, ingest_text_file, build_index, build_index_from_pages, save_index
+
         # Ingest source with helpful auto-detection
+        pdf_path = None
+        pages = None
         if args.pdf:
+            pdf_path = args.pdf
+        elif os.path.isdir(args.text):
             if args.verbose:
-                print(f"[rag][index] source=PDF path={args.pdf}")
-            text = ingest_pdf(args.pdf)
+                print(f"[rag][index] source=DIR path={args.text} encoding={args.encoding}")
+            pages = iter_path_texts([args.text], encoding=args.encoding)
+        elif is_pdf(args.text):
+            print("[rag] Notice: --text points to a PDF; switching to PDF ingestion.")
+            pdf_path = args.text
         else:
-            if _looks_like_pdf(args.text):
-                print("[rag] Notice: --text points to a PDF; switching to PDF ingestion.")
-                if args.verbose:
-                    print(f"[rag][index] source=PDF path={args.text}")
-                text = ingest_pdf(args.text)
-            else:
+            if args.verbose:
+                print(f"[rag][index] source=TEXT path={args.text} encoding={args.encoding}")
+            try:
+                text = ingest_text_file(args.text, encoding=args.encoding)
+            except UnicodeDecodeError:
+                print(
+                    f"[rag] Decode error for {args.text} with encoding '{args.encoding}'. "
+                    "Use --encoding to set the correct charset (e.g., latin-1), or use --pdf if this is a PDF."
+                )
+                return 2
+            except ValueError as e:
+                print(f"[rag] {e}")
+                return 2
+
+        build_opts = dict(lang=args.lang, emb_name=args.emb, chunk_size=args.chunk_size,
+                          overlap=args.chunk_overlap, int8=args.int8, ann=args.ann)
+        if pdf_path or pages is not None:
+            # PDFs (and directories) are chunked page by page / file by file;
+            # source stats are gathered on the way.
+            if pdf_path:
                 if args.verbose:
-                    print(f"[rag][index] source=TEXT path={args.text} encoding={args.encoding}")
-                try:
-                    text = ingest_text_file(args.text, encoding=args.encoding)
-                except UnicodeDecodeError:
-                    print(
-                        f"[rag] Decode error for {args.text} with encoding '{args.encoding}'. "
-                        "Use --encoding to set the correct charset (e.g., latin-1), or use --pdf if this is a PDF."
-                    )
-                    return 2
-                except ValueError as e:
-                    print(f"[rag] {e}")
-                    return 2
-
-        if not text.strip():
-            print("[rag] Warning: source text is empty; PDF may be image-based.")
+                    print(f"[rag][index] source=PDF path={pdf_path}")
+                pages = iter_pdf_pages(pdf_path)
+            stats = {"chars": 0, "words": 0, "first": ""}
+            try:
+                index = build_index_from_pages(_counted(pages, stats, words=args.verbose), **build_opts)
+            except UnicodeDecodeError:
+                print(f"[rag] Decode error under {args.text} with encoding '{args.encoding}'. "
+                      "Use --encoding to set the correct charset.")
+                return 2
+            chars, words, first = stats["chars"], stats["words"], stats["first"]
         else:
-            if args.verbose:
-                chars = len(text)
-                words = len(text.split())
-                print(f"[rag][index] lang={args.lang} emb={args.emb} chunk={args.chunk_size}/{args.chunk_overlap}")
-                print(f"[rag][index] source_size chars={chars} words≈{words} preview='{_preview(text)}'")
-
-        index = build_index(
-            text,
-            lang=args.lang,
-            emb_name=args.emb,
-            chunk_size=args.chunk_size,
-            overlap=args.chunk_overlap,
-        )
+            index = build_index(text, **build_opts)
+            chars, first = len(text), text
+            words = len(text.split()) if args.verbose else 0
+
+        if not first.strip():
+            print("[rag] Warning: source text is empty; PDF may be image-based.")
+        elif args.verbose:
+            print(f"[rag][index] lang={args.lang} emb={args.emb} chunk={args.chunk_size}/{args.chunk_overlap}")
+            print(f"[rag][index] source_size chars={chars} words≈{words} preview='{preview(first)}'")
+
         if args.verbose:
             n = len(index["chunks"])
             vecs = index["vectors"]
             shape = getattr(vecs, "shape", None)
             print(f"[rag][index] chunks={n} vectors_shape={shape}")
             if n:
-                print(f"[rag][index] first_chunk preview='{_preview(index['chunks'][0])}'")
+                print(f"[rag][index] first_chunk preview='{preview(index['chunks'][0])}'")
 
         save_index(index, args.out)
         print(f"[rag] Indexed {len(index['chunks'])} chunks → {args.out}")
         return 0
 
+    if args.cmd == "serve":
+        from server import make_server
+
+        with make_server(args.index, verbose=args.verbose) as srv:
+            print(f"[rag] Serving {args.index} on {srv.server_address} (Ctrl+C to stop)")
+            try:
+                srv.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
     if args.cmd == "query":
+        # the server answers with its own model/endpoint, so overrides run locally
+        if not (args.verbose or args.model or args.base_url):
+            try:
+                from server import ask
+            except Exception:  # no Unix sockets on this platform
+                ask = None
+            req = dict(q=args.q, top_k=args.top_k, llm=args.llm, citations=args.citations)
+            reply = ask(args.index, req) if ask else None
+            if reply is not None:
+                print(reply)
+                return 0
+
+        from indexer import load_index
+        from retriever import search
+        from qa import answer_offline, answer_with_llm_stream
+
         if args.verbose:
             print(f"[rag][query] index={args.index}")
         index = load_index(args.index)
@@ -149,14 +201,16 @@ def main(argv=None) -> int:
         if args.verbose:
             print("[rag][query] hits (ranked):")
             for rank, (score, chunk, idx) in enumerate(hits, 1):
-                print(f"  #{rank} idx={idx} score={score:.3f} preview='{_preview(chunk)}'")
+                print(f"  #{rank} idx={idx} score={score:.3f} preview='{preview(chunk)}'")
 
         if args.llm:
             if args.verbose:
                 print(f"[rag][query] mode=LLM model={args.model or os.getenv('MODEL', 'gpt-4o-mini')} "
                       f"base_url={args.base_url or os.getenv('OPENAI_BASE_URL') or os.getenv('OPENAI_API_BASE')}")
-            print(answer_with_llm(args.q, hits, model=args.model, base_url=args.base_url,
-                                  citations=args.citations, verbose=args.verbose))
+            for piece in answer_with_llm_stream(args.q, hits, model=args.model, base_url=args.base_url,
+                                                citations=args.citations, verbose=args.verbose, index=index):
+                print(piece, end="", flush=True)
+            print()
         else:
             if args.verbose:
                 print("[rag][query] mode=OFFLINE")
@@ -4,89 +4,259 @@ Section 4 — Indexer (PDF/text ingestion → chunk → embed → persist)
 OVERVIEW
 --------
 Reads source documents (PDF or plain text), splits into language-aware chunks,
-computes embeddings (TF-IDF by default), and persists an index as a **pickle**
-file. Designed to be deterministic and portable for workshops.
+computes embeddings (TF-IDF by default), and persists the index either as an
+**index directory** (default) or, for paths ending in `.pkl`, a single
+**pickle** file. Designed to be deterministic and portable for workshops.
 
-INDEX FORMAT (pickled dict)
----------------------------
+INDEX FORMAT (in-memory dict)
+-----------------------------
 {
   'meta': {
       'lang': 'en'|'fa',
-      'emb': 'tfidf'|'sbert',
+      'emb': 'tfidf'|'hashing'|'sbert',
       'chunk_size': int,
       'overlap': int,
+      'normalized': True,   # vector rows are L2-normalized (absent in old indexes)
+      'int8': True,         # only with --int8
+      'ann': 'hnsw'|'flat'|'sq8',  # only with --ann (SBERT)
   },
-  'chunks': [str, ...],         # chunk texts in order
-  'vectors': np.ndarray,        # shape (N, D)
-  'tfidf_vectorizer': object | None  # only for tfidf (to transform queries)
+  'chunks': [str, ...],         # chunk texts in order (a `ChunkStore` once saved/loaded)
+  'vectors': np.ndarray | scipy.sparse.csr_matrix,  # shape (N, D); CSR for tfidf
+  'tfidf_vectorizer': object | None  # tfidf/hashing only (to transform queries)
+  'scales': np.ndarray,         # only with --int8: row i ≈ int8 vectors[i] * scales[i]
+  'ann': faiss.Index,           # only with --ann (see `load_ann`)
 }
 
+ON DISK
+-------
+An index directory holds plain columnar files instead of one pickle, so a
+query-time load is a few small JSON reads plus an mmap of the vectors:
+
+  meta.json     # 'meta' plus format info and the TF-IDF constructor params
+  chunks.npy    # all chunk texts as one UTF-8 byte blob (uint8, mmap'd on load)
+  chunk_offsets.npy  # int64 (N+1,): chunk i is blob[offsets[i]:offsets[i+1]]
+  chunks.json   # list of chunk strings (older indexes; still read)
+  vectors.npy   # dense float32 (N, D); opened with mmap_mode="r" on load
+  vectors.npz   # ...or, for TF-IDF, the sparse CSR matrix (scipy save_npz)
+  vocab.json    # TF-IDF terms, ordered by column index
+  idf.npy       # TF-IDF idf weights
+  scales.npy    # per-row float32 scales for int8 vectors (--int8 only)
+  vectors.faiss # FAISS HNSW/flat/SQ8 index (--ann only); read on first query
+  extra.pkl     # only if the dict carries keys/objects the format doesn't know
+
+Saving writes meta.json last (beside, then renamed over the old one), so a
+changed meta.json means the other files are complete; `rag serve` reloads on
+that signal.
+
+`load_index` rebuilds a ready-to-use `TfidfVectorizer` from vocab + idf.
+Paths ending in `.pkl` are read and written as the legacy pickled dict
+(protocol 5, with numpy buffers stored out of band, 64-byte aligned, after a
+small header). Loading maps the file copy-on-write and builds the arrays on
+the mapping, so a `.pkl` index pages in on demand like `vectors.npy` does;
+earlier out-of-band files and plain pickles still load.
+
+IMPORTS
+-------
+pypdf/pypdfium2, scikit-learn, the chunkers and the embedding backends are imported
+inside the functions that use them: `load_index` for an SBERT index touches
+none of them, and TF-IDF loads only pull in the vectorizer.
+
 FUNCTIONS
 ---------
-- `ingest_pdf(path)` → text
+- `iter_pdf_pages(path, workers=None)` → page texts, lazily (page ranges
+  extracted in a process pool once a PDF has `PARALLEL_MIN_PAGES` pages or more;
+  uses PDFium through the optional `pypdfium2` when installed, else pypdf)
+- `ingest_pdf(path, workers=None)` → text (all pages joined)
 - `ingest_text_file(path, encoding='utf-8')` → text (validates it's not a PDF)
+- `iter_path_texts(paths, encoding='utf-8')` / `ingest_paths(...)` → texts of
+  files and directory trees (`TEXT_SUFFIXES` files and PDFs), lazily / joined
 - `build_index(text, lang, emb_name, chunk_size, overlap)` → index dict
-- `save_index(index, path)` / `load_index(path)`
+- `build_index_from_pages(pages, ...)` → same, streaming pages through the
+  chunker so the full document text is never materialized
+- `save_index(index, path)` / `load_index(path)` (directory or `.pkl`)
+- `ChunkStore`: read-only sequence of chunk texts over one blob + offsets;
+  a loaded index holds one of these instead of N `str` objects, and a
+  chunk is decoded only when a query returns it
 """
 
 from __future__ import annotations
-from typing import Dict, Any
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import mmap
+import operator
 import os
 import pickle
 
 import numpy as np
-from pypdf import PdfReader
+import scipy.sparse as sp
 
-from chunking import chunk_text
-from embeddings import TfidfEmbedding, SbertEmbedding
+from _util import is_pdf
 
+if TYPE_CHECKING:  # pragma: no cover
+    from pypdf import PdfReader
 
-def _is_pdf(path: str) -> bool:
-    try:
-        with open(path, "rb") as f:
-            head = f.read(5)
-        return head.startswith(b"%PDF-")
-    except Exception:
-        return path.lower().endswith(".pdf")
+
+# Below this many pages a process pool costs more (spawn + re-parse) than it saves.
+PARALLEL_MIN_PAGES = 100
+_PAGES_PER_TASK = 16
 
 
-def ingest_pdf(path: str) -> str:
-    reader = PdfReader(path)
+def _extract_pages(reader: PdfReader, start: int, stop: int) -> List[str]:
     texts = []
-    for page in reader.pages:
+    for page in reader.pages[start:stop]:
         try:
             t = page.extract_text() or ""
         except Exception:
             t = ""
         if t:
             texts.append(t)
-    return "\n".join(texts)
+    return texts
+
+
+def _extract_pages_pdfium(doc: Any, start: int, stop: int) -> List[str]:
+    texts = []
+    for i in range(start, stop):
+        page = doc[i]
+        try:
+            textpage = page.get_textpage()
+            t = textpage.get_text_range().replace("\r\n", "\n")
+            textpage.close()
+        except Exception:
+            t = ""
+        finally:
+            page.close()
+        if t:
+            texts.append(t)
+    return texts
+
+
+def _open_pdf(path: str) -> Tuple[Any, int, Callable[[Any, int, int], List[str]]]:
+    """(document, page count, extract(document, start, stop)) using PDFium via
+    pypdfium2 when installed (C++, much faster), else pypdf."""
+    try:
+        import pypdfium2 as pdfium  # type: ignore
+
+        doc = pdfium.PdfDocument(path)
+        return doc, len(doc), _extract_pages_pdfium
+    except Exception:  # not installed, or PDFium can't open this file
+        from pypdf import PdfReader
+
+        reader = PdfReader(path)
+        return reader, len(reader.pages), _extract_pages
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # Worker side: PDF objects don't pickle, so each task re-opens the file.
+    doc, _, extract = _open_pdf(path)
+    return extract(doc, start, stop)
+
+
+def iter_pdf_pages(path: str, *, workers: Optional[int] = None) -> Iterator[str]:
+    """Yield non-empty page texts in order; large PDFs are split across processes
+    (PDFium is not thread-safe, so threads are not an option for it either)."""
+    doc, n_pages, extract = _open_pdf(path)
+    workers = workers or os.cpu_count() or 1
+    if n_pages < PARALLEL_MIN_PAGES or workers < 2:
+        for i in range(n_pages):
+            yield from extract(doc, i, i + 1)
+        return
+
+    starts = range(0, n_pages, _PAGES_PER_TASK)
+    stops = [min(s + _PAGES_PER_TASK, n_pages) for s in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_extract_page_range, [path] * len(stops), starts, stops):
+            yield from part
+
+
+def ingest_pdf(path: str, *, workers: Optional[int] = None) -> str:
+    """Extract text from all pages as one string (see `iter_pdf_pages`)."""
+    return "\n".join(iter_pdf_pages(path, workers=workers))
 
 
 def ingest_text_file(path: str, *, encoding: str = "utf-8") -> str:
     # Guard against PDFs passed to --text
-    if _is_pdf(path):
+    if is_pdf(path):
         raise ValueError(f"File looks like a PDF: {path}. Use --pdf instead of --text.")
     with open(path, "r", encoding=encoding) as f:
         return f.read()
 
 
+# Files picked up when a directory is ingested (PDFs are told apart by content).
+TEXT_SUFFIXES = (".txt", ".md", ".rst")
+_READ_BATCH = 64
+
+
+def _scan_dir(path: str) -> Iterator[str]:
+    # DirEntry carries the file type from the directory listing: no stat per file.
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for e in entries:
+        if e.name.startswith("."):
+            continue
+        if e.is_dir(follow_symlinks=False):
+            yield from _scan_dir(e.path)
+        elif e.is_file() and e.name.lower().endswith(TEXT_SUFFIXES + (".pdf",)):
+            yield e.path
+
+
+def _read_unless_pdf(path: str) -> Optional[bytes]:
+    if is_pdf(path):
+        return None  # extracted page by page later, never read whole
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def iter_path_texts(paths: Iterable[str], *, encoding: str = "utf-8") -> Iterator[str]:
+    """Yield texts from files and directories (walked recursively, sorted by
+    name) in order: one item per text file, one per page for PDFs. Files are
+    read by a small thread pool, `_READ_BATCH` at a time."""
+    files = [f for p in paths for f in (_scan_dir(p) if os.path.isdir(p) else (p,))]
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as pool:
+        for i in range(0, len(files), _READ_BATCH):
+            batch = files[i:i + _READ_BATCH]
+            for path, data in zip(batch, pool.map(_read_unless_pdf, batch)):
+                if data is None:
+                    yield from iter_pdf_pages(path)
+                    continue
+                text = data.decode(encoding)
+                if text.strip():
+                    yield text
+
+
+def ingest_paths(paths: Iterable[str], *, encoding: str = "utf-8") -> str:
+    """All texts under `paths` as one string (see `iter_path_texts`)."""
+    return "\n".join(iter_path_texts(paths, encoding=encoding))
+
+
 def _select_embedder(name: str):
+    from embeddings import HashingTfidfEmbedding, TfidfEmbedding, SbertEmbedding
+
     n = (name or "tfidf").lower()
     if n == "tfidf":
         return "tfidf", TfidfEmbedding()
+    if n == "hashing":
+        return "hashing", HashingTfidfEmbedding()
     if n == "sbert":
         return "sbert", SbertEmbedding()
     raise ValueError(f"Unknown embedding backend: {name}")
 
 
-def build_index(text: str, *, lang: str = "en", emb_name: str = "tfidf", chunk_size: int = 600, overlap: int = 120) -> Dict[str, Any]:
-    text = (text or "").strip()
-    sentences = chunk_text(text, lang=lang, chunk_size=chunk_size, overlap=overlap)
-    chunks = sentences  # already grouped
+def _build_from_chunks(
+    chunks: List[str], *, lang: str, emb_name: str, chunk_size: int, overlap: int, int8: bool, ann: Optional[str]
+) -> Dict[str, Any]:
+    from sklearn.preprocessing import normalize
 
+    if ann and (emb_name or "tfidf").lower() != "sbert":
+        raise ValueError("--ann needs dense vectors; use it with --emb sbert")
     emb_key, embedder = _select_embedder(emb_name)
-    vectors = embedder.fit_transform(chunks)
+    # Unit rows make query-time cosine a single product (see `cosine_sim`).
+    vectors = normalize(embedder.fit_transform(chunks), norm="l2", copy=False)
+    if not sp.issparse(vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)  # C-order rows for the GEMV
 
     index: Dict[str, Any] = {
         "meta": {
@@ -94,20 +264,316 @@ def build_index(text: str, *, lang: str = "en", emb_name: str = "tfidf", chunk_s
             "emb": emb_key,
             "chunk_size": chunk_size,
             "overlap": overlap,
+            "normalized": True,
         },
         "chunks": chunks,
         "vectors": vectors,
         "tfidf_vectorizer": getattr(embedder, "vectorizer", None),
     }
+    if ann:
+        from embeddings import build_ann
+
+        index["ann"] = build_ann(vectors, ann)  # built from the float rows
+        index["meta"]["ann"] = ann
+    if int8:
+        from embeddings import quantize_int8
+
+        index["vectors"], index["scales"] = quantize_int8(vectors)
+        index["meta"]["int8"] = True
+    return index
+
+
+def build_index(text: str, *, lang: str = "en", emb_name: str = "tfidf", chunk_size: int = 600, overlap: int = 120, int8: bool = False, ann: Optional[str] = None) -> Dict[str, Any]:
+    from chunking import chunk_text
+
+    text = (text or "").strip()
+    chunks = chunk_text(text, lang=lang, chunk_size=chunk_size, overlap=overlap)
+    return _build_from_chunks(chunks, lang=lang, emb_name=emb_name, chunk_size=chunk_size, overlap=overlap, int8=int8, ann=ann)
+
+
+def build_index_from_pages(pages: Iterable[str], *, lang: str = "en", emb_name: str = "tfidf", chunk_size: int = 600, overlap: int = 120, int8: bool = False, ann: Optional[str] = None) -> Dict[str, Any]:
+    """Like `build_index`, but chunks pages as they arrive instead of joining
+    the whole document into one string first."""
+    from chunking import chunk_pages
+
+    chunks = list(chunk_pages(pages, lang=lang, chunk_size=chunk_size, overlap=overlap))
+    return _build_from_chunks(chunks, lang=lang, emb_name=emb_name, chunk_size=chunk_size, overlap=overlap, int8=int8, ann=ann)
+
+
+class ChunkStore(Sequence):
+    """Chunk texts as one UTF-8 blob (uint8 array) plus N+1 int64 offsets.
+
+    Behaves like the list of strings it replaces (len, indexing, iteration,
+    == against a list), but costs two arrays instead of N Python objects,
+    pickles as two out-of-band buffers and can sit on an mmap'd file.
+    """
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "ChunkStore":
+        if isinstance(texts, ChunkStore):
+            return texts
+        encoded = [t.encode("utf-8") for t in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = operator.index(i)
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("chunk index out of range")
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ChunkStore({len(self)} chunks, {self.blob.nbytes} bytes)"
+
+
+INDEX_FORMAT = 1
+_KNOWN_KEYS = ("meta", "chunks", "vectors", "tfidf_vectorizer", "scales", "ann")
+# JSON-serializable TfidfVectorizer params needed to rebuild the query transform
+_TFIDF_PARAMS = (
+    "lowercase", "strip_accents", "stop_words", "token_pattern", "ngram_range",
+    "analyzer", "binary", "norm", "use_idf", "smooth_idf", "sublinear_tf",
+)
+
+
+def _is_pickle_path(path: str) -> bool:
+    return path.lower().endswith(".pkl")
+
+
+_OOB_MAGIC_V1 = "rag-index-oob/1"  # unaligned buffers, read into memory
+_OOB_MAGIC = "rag-index-oob/2"
+_OOB_ALIGN = 64
+_WRITE_BUFFER = 4 * 1024 * 1024
+
+
+def _dump_pickle(obj: Any, path: str) -> None:
+    """Protocol-5 pickle with numpy buffers out of band: a small header
+    (magic, buffer sizes), the raw buffers (each starting on a 64-byte
+    boundary), then the pickle that refers to them. Arrays are written
+    straight from their memory, never via `bytes`. The file is written
+    beside `path` and renamed over it, since `path` may be mapped."""
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+    tmp = path + ".tmp"
+    with open(tmp, "wb", buffering=_WRITE_BUFFER) as f:
+        pickle.dump((_OOB_MAGIC, [r.nbytes for r in raws]), f, protocol=pickle.HIGHEST_PROTOCOL)
+        for r in raws:
+            f.write(b"\0" * (-f.tell() % _OOB_ALIGN))
+            f.write(r)
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def _load_pickle(path: str) -> Any:
+    with open(path, "rb") as f:
+        head = pickle.load(f)
+        if not (isinstance(head, tuple) and head[:1] in ((_OOB_MAGIC,), (_OOB_MAGIC_V1,))):
+            return head  # plain pickle (older indexes, or written elsewhere)
+        if head[0] == _OOB_MAGIC:
+            # copy-on-write map: arrays see the file's pages (shared via the
+            # page cache, loaded on touch) and stay writable without changing it
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            pos, buffers = f.tell(), []
+            for n in head[1]:
+                pos += -pos % _OOB_ALIGN
+                buffers.append(view[pos:pos + n])
+                pos += n
+            f.seek(pos)
+            return pickle.load(f, buffers=buffers)
+        buffers = []
+        for n in head[1]:
+            buf = bytearray(n)  # arrays are rebuilt on top of these, no copy
+            if f.readinto(buf) != n:
+                raise EOFError(f"Truncated index file: {path}")
+            buffers.append(buf)
+        return pickle.load(f, buffers=buffers)
+
+
+def _write_json(path: str, obj: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _tfidf_params(vec: Any) -> Optional[Dict[str, Any]]:
+    """Constructor params for a fitted TfidfVectorizer, or None if it can't be
+    rebuilt from vocab + idf (not TF-IDF, or uses callables)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if not isinstance(vec, TfidfVectorizer) or not hasattr(vec, "idf_"):
+        return None
+    if vec.tokenizer is not None or vec.preprocessor is not None:
+        return None
+    all_params = vec.get_params()
+    params = {p: all_params[p] for p in _TFIDF_PARAMS}
+    try:
+        json.dumps(params)
+    except TypeError:  # e.g. a callable analyzer
+        return None
+    return params
+
+
+def load_ann(index: Dict[str, Any]) -> Any:
+    """The index's FAISS index (None if built without --ann), materialized on
+    first use: a loaded index holds only its file path (directory) or its
+    serialized bytes (pickle) until a query needs it."""
+    ann = index.get("ann")
+    if not isinstance(ann, (str, np.ndarray)):
+        return ann
+    import faiss  # type: ignore
+
+    index["ann"] = faiss.read_index(ann) if isinstance(ann, str) else faiss.deserialize_index(ann)
+    return index["ann"]
+
+
+def _save_npy(path: str, arr: np.ndarray) -> None:
+    # write beside and rename: the old file may still be mmap'd by this index
+    tmp = path + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _save_dir(index: Dict[str, Any], path: str) -> None:
+    os.makedirs(path, exist_ok=True)
+    extra = {k: v for k, v in index.items() if k not in _KNOWN_KEYS}
+    meta = dict(index.get("meta", {}), format=INDEX_FORMAT)
+
+    vec = index.get("tfidf_vectorizer")
+    params = _tfidf_params(vec)
+    if params is not None:
+        terms = [""] * len(vec.vocabulary_)
+        for term, col in vec.vocabulary_.items():
+            terms[col] = term
+        meta["tfidf"] = params
+        _write_json(os.path.join(path, "vocab.json"), terms)
+        np.save(os.path.join(path, "idf.npy"), vec.idf_)
+    elif vec is not None:  # custom analyzer/tokenizer etc.: keep it pickled
+        extra["tfidf_vectorizer"] = vec
+
+    store = ChunkStore.from_texts(index["chunks"])
+    _save_npy(os.path.join(path, "chunks.npy"), np.asarray(store.blob))
+    _save_npy(os.path.join(path, "chunk_offsets.npy"), np.asarray(store.offsets))
+    if os.path.exists(os.path.join(path, "chunks.json")):
+        os.remove(os.path.join(path, "chunks.json"))
+    vectors = index["vectors"]
+    if sp.issparse(vectors):
+        sp.save_npz(os.path.join(path, "vectors.npz"), sp.csr_matrix(vectors))
+        stale = "vectors.npy"
+    else:
+        _save_npy(os.path.join(path, "vectors.npy"), np.asarray(vectors))
+        stale = "vectors.npz"
+    if os.path.exists(os.path.join(path, stale)):
+        os.remove(os.path.join(path, stale))
+    ann_path = os.path.join(path, "vectors.faiss")
+    ann = index.get("ann")
+    if ann is not None:
+        if not (isinstance(ann, str) and os.path.abspath(ann) == os.path.abspath(ann_path)):
+            import faiss  # type: ignore
+
+            faiss.write_index(load_ann(index), ann_path)
+    elif os.path.exists(ann_path):
+        os.remove(ann_path)
+    scales_path = os.path.join(path, "scales.npy")
+    if index.get("scales") is not None:
+        np.save(scales_path, np.asarray(index["scales"]))
+    elif os.path.exists(scales_path):
+        os.remove(scales_path)
+    extra_path = os.path.join(path, "extra.pkl")
+    if extra:
+        _dump_pickle(extra, extra_path)
+    elif os.path.exists(extra_path):
+        os.remove(extra_path)
+    meta_tmp = os.path.join(path, "meta.json.tmp")
+    _write_json(meta_tmp, meta)
+    os.replace(meta_tmp, os.path.join(path, "meta.json"))
+
+
+def _load_vectors(path: str) -> Any:
+    npz = os.path.join(path, "vectors.npz")
+    if os.path.exists(npz):
+        return sp.load_npz(npz).tocsr()
+    # dense rows page in on demand; the OS page cache is shared across processes
+    return np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+
+
+def _load_chunks(path: str) -> Sequence:
+    blob = os.path.join(path, "chunks.npy")
+    if not os.path.exists(blob):
+        return _read_json(os.path.join(path, "chunks.json"))
+    return ChunkStore(np.load(blob, mmap_mode="r"), np.load(os.path.join(path, "chunk_offsets.npy")))
+
+
+def _load_dir(path: str) -> Dict[str, Any]:
+    meta = _read_json(os.path.join(path, "meta.json"))
+    meta.pop("format", None)
+    params = meta.pop("tfidf", None)
+
+    vectorizer = None
+    if params is not None:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        terms = _read_json(os.path.join(path, "vocab.json"))
+        params["ngram_range"] = tuple(params["ngram_range"])
+        vectorizer = TfidfVectorizer(vocabulary=dict(zip(terms, range(len(terms)))), **params)
+        vectorizer.idf_ = np.load(os.path.join(path, "idf.npy"))
+
+    index: Dict[str, Any] = {
+        "meta": meta,
+        "chunks": _load_chunks(path),
+        "vectors": _load_vectors(path),
+        "tfidf_vectorizer": vectorizer,
+    }
+    scales_path = os.path.join(path, "scales.npy")
+    if os.path.exists(scales_path):
+        index["scales"] = np.load(scales_path)
+    ann_path = os.path.join(path, "vectors.faiss")
+    if os.path.exists(ann_path):
+        index["ann"] = ann_path  # read on first query (see `load_ann`)
+    extra_path = os.path.join(path, "extra.pkl")
+    if os.path.exists(extra_path):
+        index.update(_load_pickle(extra_path))
     return index
 
 
 def save_index(index: Dict[str, Any], path: str) -> None:
+    if not _is_pickle_path(path):
+        _save_dir(index, path)
+        return
     os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
-    with open(path, "wb") as f:
-        pickle.dump(index, f)
+    if index.get("ann") is not None and not isinstance(index["ann"], np.ndarray):
+        import faiss  # type: ignore
+
+        index = dict(index, ann=faiss.serialize_index(load_ann(index)))  # FAISS objects don't pickle
+    _dump_pickle(dict(index, chunks=ChunkStore.from_texts(index["chunks"])), path)
 
 
 def load_index(path: str) -> Dict[str, Any]:
-    with open(path, "rb") as f:
-        return pickle.load(f)
+    if os.path.isdir(path):
+        return _load_dir(path)
+    return _load_pickle(path)
@@ -1,11 +1,36 @@
 """
 Section 4 — Prompt builders for RAG
 
+- system_prompt(citations): the fixed instructions, incl. how to cite.
 - build_context(retrieved): format retrieved chunks with [chunk:ID] labels.
-- rag_prompt(question, context, citations): instructs model on how to cite.
+- rag_prompt(question, context): the per-call user message.
+- batch_rag_prompt(items): several (question, context) pairs in one user
+  message, answered as a JSON object.
+
+Ordering is stable → volatile: the system message never changes for a given
+citations mode, the context comes next and the question last. Providers that
+cache prompt prefixes (OpenAI does so automatically past 1024 tokens) can
+then reuse everything up to the question.
 """
 from __future__ import annotations
 from typing import List, Tuple
+import io
+
+
+STATIC_SYSTEM_PROMPT = """You are a helpful assistant answering questions using ONLY the provided context.
+If the answer is not contained in the context, say you don't know.
+Be concise and clear."""
+
+_CITE_CLAUSES = {
+    "inline": "Cite sources inline using the labels like [chunk:ID] when making factual claims.",
+    "refs":   "Do NOT include [chunk:ID] inline. After the answer, add a 'Sources:' list that names the chunk IDs you used.",
+    "none":   "Do NOT include any [chunk:ID] tags or source IDs in the final answer.",
+}
+
+# Everything but the question and context is fixed per citations mode:
+# build it once here, and per call only join the pieces.
+_SYSTEM_PROMPTS = {mode: f"{STATIC_SYSTEM_PROMPT} {clause}" for mode, clause in _CITE_CLAUSES.items()}
+_CONTEXT_HEAD, _QUESTION_HEAD, _ANSWER_HEAD = "Context:\n", "\n\nQuestion:\n", "\n\nAnswer:"
 
 
 def build_context(retrieved: List[Tuple[float, str, int]]) -> str:
@@ -13,38 +38,46 @@ def build_context(retrieved: List[Tuple[float, str, int]]) -> str:
     Build a context block with explicit [chunk:ID] labels so the model
     can cite if needed. We keep the chunk text faithful.
     """
-    lines = []
-    for _, chunk, idx in retrieved:
-        lines.append(f"[chunk:{idx}]\n{chunk}\n")
-    return "\n".join(lines)
+    buf = io.StringIO()
+    w = buf.write
+    for i, (_, chunk, idx) in enumerate(retrieved):
+        if i:
+            w("\n")
+        w("[chunk:")
+        w(str(idx))
+        w("]\n")
+        w(chunk)
+        w("\n")
+    return buf.getvalue()
 
 
-def rag_prompt(question: str, context: str, *, citations: str = "inline") -> str:
+def system_prompt(citations: str = "inline") -> str:
     """
-    Construct a compact instruction prompt. 'citations' controls how the
-    model should present sources in the **final** answer:
+    System message: STATIC_SYSTEM_PROMPT plus how to present sources in the
+    **final** answer:
       - 'inline' : cite using [chunk:ID] inline when making claims.
       - 'refs'   : DO NOT include [chunk:ID] inline; after the answer,
                    add a 'Sources:' list with the chunk IDs you used.
       - 'none'   : DO NOT include any [chunk:ID] tags in the final answer.
     """
-    if citations not in ("inline", "refs", "none"):
-        citations = "inline"
+    return _SYSTEM_PROMPTS.get(citations, _SYSTEM_PROMPTS["inline"])
 
-    cite_clause = {
-        "inline": "Cite sources inline using the labels like [chunk:ID] when making factual claims.",
-        "refs":   "Do NOT include [chunk:ID] inline. After the answer, add a 'Sources:' list that names the chunk IDs you used.",
-        "none":   "Do NOT include any [chunk:ID] tags or source IDs in the final answer.",
-    }[citations]
 
-    return f"""You are answering a question using ONLY the provided context.
-If the answer is not contained in the context, say you don't know.
-Be concise and clear. {cite_clause}
+def rag_prompt(question: str, context: str) -> str:
+    """User message: the retrieved context, then the question at the very end."""
+    return "".join((_CONTEXT_HEAD, context, _QUESTION_HEAD, question, _ANSWER_HEAD))
+
 
-Context:
-{context}
+def batch_rag_prompt(items: List[Tuple[str, str]]) -> str:
+    """
+    One prompt for several (question, context) pairs. Each question is
+    answered using ONLY its own context; the model replies with
+    {"answers": [{"id": 1, "text": "..."}, ...]} (ids are 1-based).
+    """
+    blocks = [f"Q{i}:\n{q}\n\nCONTEXT{i}:\n{ctx}" for i, (q, ctx) in enumerate(items, 1)]
+    body = "\n\n".join(blocks)
+    return f"""Answer {len(items)} independent questions. Answer each Qn using ONLY CONTEXTn.
 
-Question:
-{question}
+{body}
 
-Answer:"""
+Reply with a JSON object only: {{"answers": [{{"id": n, "text": "answer to Qn"}}, ...]}} with one entry per question."""
@@ -9,38 +9,171 @@ Citations control (via CLI --citations):
 - inline: keep [chunk:ID] inline.
 - refs  : remove inline tags; append a 'Sources:' list with IDs and previews.
 - none  : strip all [chunk:ID] tags.
+
+Prompts: the system message holds the fixed instructions (see prompts.py)
+and the user message ends with the question, so provider prefix caches can
+reuse the shared part.
+
+Response cache: LLM replies are cached by a blake2b digest of
+(model, base URL, system message, prompt); the call is deterministic
+(temperature=0), so a repeated question over the same chunks is answered
+without a request. The cache is an in-process LRU (useful under `serve`);
+set RAG_LLM_CACHE=<file> to also keep it in SQLite across CLI runs.
+When the caller passes a loaded SBERT `index`, paraphrased questions are
+also served from `semantic_cache` (question-embedding cosine ≥ 0.88, same
+citations mode and same retrieved chunks).
+
+Confidence gate: when the top hit clearly wins (score > RAG_LLM_SKIP_SCORE,
+default 0.9, and ahead of the runner-up by more than RAG_LLM_SKIP_MARGIN,
+default 0.2), the LLM is skipped and the offline summary of that one chunk
+is returned. Set RAG_LLM_SKIP_SCORE=1.1 to always call the LLM.
+
+Batching: `answer_with_llm_batch` packs up to BATCH_SIZE questions (each
+with its own context) into one JSON-mode request, which saves round-trips
+under provider request-per-minute limits. A group whose reply can't be
+parsed is answered one question at a time instead.
+
+Streaming: `answer_with_llm_stream` yields text as it is generated; the
+citations mode is applied on the fly (a partial [chunk: tag is held back
+until it is complete), so the first words show up long before the end.
+Given the loaded `index`, it consults and fills the same semantic cache as
+`answer_with_llm`, so `rag query --llm` and `rag serve` answer alike.
+
+Concurrency: `answer_many` sends independent questions concurrently through
+`AsyncOpenAI` (at most `concurrency` in flight), sharing the response cache.
+With `hedge_after` seconds (or RAG_LLM_HEDGE_DELAY), a request that hasn't
+answered by then is sent a second time and the first reply wins; this caps
+tail latency at the price of extra spend on slow calls, so it is off by
+default. Transient errors are already retried with jittered backoff by the
+OpenAI client itself (`max_retries`).
 """
 from __future__ import annotations
-from typing import List, Tuple, Optional
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
+import asyncio
+import functools
+import hashlib
+import json
 import os
 import re
+import sqlite3
 
 from dotenv import load_dotenv
 load_dotenv()
 
-try:  # lazy import; only used if --llm
-    from openai import OpenAI
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
+try:  # optional C parser for the JSON-mode batch replies; raises ValueError subclasses too
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
+
+from _util import preview
+from prompts import batch_rag_prompt, build_context, rag_prompt, system_prompt
+
+
+def _openai_cls():
+    try:  # imported on first use; only needed for --llm
+        from openai import OpenAI
+    except Exception:  # pragma: no cover
+        return None
+    return OpenAI
+
+
+def _async_openai_cls():
+    try:
+        from openai import AsyncOpenAI
+    except Exception:  # pragma: no cover
+        return None
+    return AsyncOpenAI
+
+
+BATCH_SIZE = 6
+
+
+class _ResponseCache:
+    """LRU of LLM responses, optionally backed by a SQLite file."""
+
+    def __init__(self, maxsize: int = 1024, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, value TEXT)")
+        return self._db
 
-from prompts import build_context, rag_prompt
+    def get(self, key: str) -> Optional[str]:
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key]
+        db = self._conn()
+        row = db.execute("SELECT value FROM llm WHERE key = ?", (key,)).fetchone() if db else None
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
 
+    def put(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        db = self._conn()
+        if db:
+            with db:
+                db.execute("INSERT OR REPLACE INTO llm (key, value) VALUES (?, ?)", (key, value))
 
+    def _remember(self, key: str, value: str) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+
+_LLM_CACHE = _ResponseCache(path=os.getenv("RAG_LLM_CACHE"))
+_SKIP_SCORE = float(os.getenv("RAG_LLM_SKIP_SCORE", "0.9"))
+_SKIP_MARGIN = float(os.getenv("RAG_LLM_SKIP_MARGIN", "0.2"))
+
+
+def _confident(retrieved: List[Tuple[float, str, int]]) -> bool:
+    """Top hit scores high and well ahead of the next: no LLM needed."""
+    top = retrieved[0][0]
+    runner_up = retrieved[1][0] if len(retrieved) > 1 else 0.0
+    return top > _SKIP_SCORE and top - runner_up > _SKIP_MARGIN
+
+
+def _answer_confident(question: str, retrieved: List[Tuple[float, str, int]], citations: str, verbose: bool) -> str:
+    if verbose:
+        print(f"[rag][qa] top hit score={retrieved[0][0]:.3f} is decisive; skipping the LLM")
+    return answer_offline(question, retrieved[:1], citations=citations, verbose=verbose)
+
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# runs between str.splitlines() boundaries
+_LINE_RE = re.compile(r"[^\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]+")
+
+
+# A ChunkStore decodes a fresh str on every access, so a hit still hashes and
+# compares the whole chunk; both are single C passes, far cheaper than the
+# regex scan (which reads the whole chunk when it has no line breaks).
+@functools.lru_cache(maxsize=4096)
 def _first_lines(s: str, n: int = 2) -> str:
-    lines = [ln.strip() for ln in s.splitlines() if ln.strip()]
-    return " ".join(lines[:n])
+    # scan only as far as the n-th non-blank line instead of splitting the chunk
+    lines = (m.group().strip() for m in _LINE_RE.finditer(s))
+    return " ".join(islice(filter(None, lines), n))
 
 
-def _preview(text: str, n: int = 160) -> str:
-    t = " ".join(text.split())
-    return (t[: n] + "…") if len(t) > n else t
+_TAG_RE = re.compile(r"\[chunk:\d+\]")
 
 
 def _strip_inline_tags(text: str) -> str:
-    return re.sub(r"\[chunk:\d+\]", "", text)
+    return _TAG_RE.sub("", text)
 
 
-def _append_sources_block(text: str, retrieved: List[Tuple[float, str, int]]) -> str:
+def _sources_block(retrieved: List[Tuple[float, str, int]]) -> str:
     lines = ["", "Sources:"]
     # unique order by appearance (based on retrieved order)
     seen = set()
@@ -48,8 +181,56 @@ def _append_sources_block(text: str, retrieved: List[Tuple[float, str, int]]) ->
         if idx in seen:
             continue
         seen.add(idx)
-        lines.append(f"- [{idx}] {_preview(chunk, 140)}")
-    return text.rstrip() + "\n" + "\n".join(lines)
+        lines.append(f"- [{idx}] {preview(chunk, 140)}")
+    return "\n".join(lines)
+
+
+def _append_sources_block(text: str, retrieved: List[Tuple[float, str, int]]) -> str:
+    return text.rstrip() + "\n" + _sources_block(retrieved)
+
+
+def _apply_citations(content: str, retrieved: List[Tuple[float, str, int]], citations: str) -> str:
+    """Post-process an LLM answer to enforce the citations mode."""
+    if citations == "none":
+        return _strip_inline_tags(content)
+    if citations == "refs":
+        return _append_sources_block(_strip_inline_tags(content), retrieved)
+    return content
+
+
+# a "[chunk:12" cut off at the end of a streamed piece
+_TAG_PREFIX_RE = re.compile(r"\[(?:c(?:h(?:u(?:n(?:k(?::\d*)?)?)?)?)?)?\Z")
+
+
+def _stream_citations(
+    deltas: Iterable[str], retrieved: List[Tuple[float, str, int]], citations: str
+) -> Iterator[str]:
+    """Apply the citations mode to streamed text. The concatenated output
+    equals `_apply_citations` on the whole text: a possible partial tag is
+    held back until the next piece, and (refs) so is trailing whitespace."""
+    if citations not in ("none", "refs"):
+        yield from deltas
+        return
+    held, ws = "", ""
+    for delta in deltas:
+        text = held + delta
+        cut = text.rfind("[")
+        if cut >= 0 and _TAG_PREFIX_RE.match(text, cut):
+            text, held = text[:cut], text[cut:]
+        else:
+            held = ""
+        text = _TAG_RE.sub("", text)
+        if citations == "refs":
+            body = text.rstrip()
+            text, ws = (ws + body, text[len(body):]) if body else ("", ws + text)
+        if text:
+            yield text
+    tail = _TAG_RE.sub("", held)
+    if citations == "none":
+        if tail:
+            yield tail
+        return
+    yield (ws + tail).rstrip() + "\n" + _sources_block(retrieved)
 
 
 def answer_offline(
@@ -62,7 +243,7 @@ def answer_offline(
     if not retrieved:
         return "I couldn't find anything relevant in the index."
     if verbose:
-        print(f"[rag][qa] offline mode; chunks={len(retrieved)} question='{_preview(question, 80)}' citations={citations}")
+        print(f"[rag][qa] offline mode; chunks={len(retrieved)} question='{preview(question, 80)}' citations={citations}")
 
     if citations == "inline":
         bullets = [f"• [chunk:{idx} score:{score:.3f}] {_first_lines(chunk)}" for score, chunk, idx in retrieved]
@@ -78,6 +259,12 @@ def answer_offline(
     return "\n".join([f"Offline summary for: {question}"] + bullets)
 
 
+def _log_request(model, base_url, citations, ctx, retrieved, prompt) -> None:
+    print(f"[rag][qa] LLM synthesis model={model} base_url={base_url or 'default'} citations={citations}")
+    print(f"[rag][qa] context_len chars={len(ctx)} chunks={len(retrieved)}")
+    print(f"[rag][qa] prompt preview:\n{preview(prompt, 400)}\n---")
+
+
 def answer_with_llm(
     question: str,
     retrieved: List[Tuple[float, str, int]],
@@ -86,12 +273,16 @@ def answer_with_llm(
     base_url: Optional[str] = None,
     citations: str = "inline",
     verbose: bool = False,
+    index: Optional[Dict[str, Any]] = None,
 ) -> str:
     if not retrieved:
         return "I couldn't find anything relevant in the index."
+    if _confident(retrieved):
+        return _answer_confident(question, retrieved, citations, verbose)
 
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
+    OpenAI = _openai_cls() if api_key else None
+    if OpenAI is None:
         if verbose:
             print("[rag][qa] LLM unavailable (no API key or SDK); falling back to offline summary")
         return answer_offline(question, retrieved, citations=citations, verbose=verbose)
@@ -99,33 +290,310 @@ def answer_with_llm(
     model = model or os.getenv("MODEL", "gpt-4o-mini")
     base_url = base_url or os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE")
 
-    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+    sem = None
+    if index is not None:
+        from semantic_cache import for_index, question_vector
+
+        sem = for_index(index)
+    if sem is not None:
+        qv = question_vector(index, question)
+        scope = (model, base_url or "", citations, tuple(idx for _, _, idx in retrieved))
+        hit = sem.lookup(qv, scope)
+        if hit is not None:
+            if verbose:
+                print("[rag][qa] answer served from semantic cache.")
+            return hit
 
     ctx = build_context(retrieved)
-    prompt = rag_prompt(question, ctx, citations=citations)
+    system, prompt = system_prompt(citations), rag_prompt(question, ctx)
+
+    if verbose:
+        _log_request(model, base_url, citations, ctx, retrieved, prompt)
 
+    key = _cache_key(model, base_url or "", system, prompt)
+    content = _LLM_CACHE.get(key)
+    if content is not None:
+        if verbose:
+            print("[rag][qa] LLM response served from cache.")
+    else:
+        client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+        resp = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0,
+        )
+        content = resp.choices[0].message.content or ""
+        _LLM_CACHE.put(key, content)
+
+    content = _apply_citations(content, retrieved, citations)
+
+    if sem is not None:
+        sem.add(qv, scope, content)
     if verbose:
-        print(f"[rag][qa] LLM synthesis model={model} base_url={base_url or 'default'} citations={citations}")
-        print(f"[rag][qa] context_len chars={len(ctx)} chunks={len(retrieved)}")
-        print(f"[rag][qa] prompt preview:\n{_preview(prompt, 400)}\n---")
+        print("[rag][qa] LLM response received.")
+    return content
+
+
+def answer_with_llm_stream(
+    question: str,
+    retrieved: List[Tuple[float, str, int]],
+    *,
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    citations: str = "inline",
+    verbose: bool = False,
+    index: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """Like `answer_with_llm`, but yields the answer as the model generates
+    it (`stream=True`); the pieces join to what `answer_with_llm` returns."""
+    if not retrieved:
+        yield "I couldn't find anything relevant in the index."
+        return
+    if _confident(retrieved):
+        yield _answer_confident(question, retrieved, citations, verbose)
+        return
 
+    api_key = os.getenv("OPENAI_API_KEY")
+    OpenAI = _openai_cls() if api_key else None
+    if OpenAI is None:
+        if verbose:
+            print("[rag][qa] LLM unavailable (no API key or SDK); falling back to offline summary")
+        yield answer_offline(question, retrieved, citations=citations, verbose=verbose)
+        return
+
+    model = model or os.getenv("MODEL", "gpt-4o-mini")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE")
+
+    sem = None
+    if index is not None:
+        from semantic_cache import for_index, question_vector
+
+        sem = for_index(index)
+    if sem is not None:
+        qv = question_vector(index, question)
+        scope = (model, base_url or "", citations, tuple(idx for _, _, idx in retrieved))
+        hit = sem.lookup(qv, scope)
+        if hit is not None:
+            if verbose:
+                print("[rag][qa] answer served from semantic cache.")
+            yield hit
+            return
+
+    ctx = build_context(retrieved)
+    system, prompt = system_prompt(citations), rag_prompt(question, ctx)
+    if verbose:
+        _log_request(model, base_url, citations, ctx, retrieved, prompt)
+
+    key = _cache_key(model, base_url or "", system, prompt)
+    content = _LLM_CACHE.get(key)
+    if content is not None:
+        if verbose:
+            print("[rag][qa] LLM response served from cache.")
+        content = _apply_citations(content, retrieved, citations)
+        if sem is not None:
+            sem.add(qv, scope, content)
+        yield content
+        return
+
+    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
     resp = client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "system", "content": system},
             {"role": "user", "content": prompt},
         ],
         temperature=0,
+        stream=True,
     )
-    content = resp.choices[0].message.content or ""
+    parts: List[str] = []
 
-    # Post-process to enforce the citations mode
-    if citations == "none":
-        content = _strip_inline_tags(content)
-    elif citations == "refs":
-        content = _strip_inline_tags(content)
-        content = _append_sources_block(content, retrieved)
+    def deltas() -> Iterator[str]:
+        for chunk in resp:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
 
+    shown: List[str] = []
+    for piece in _stream_citations(deltas(), retrieved, citations):
+        shown.append(piece)
+        yield piece
+    _LLM_CACHE.put(key, "".join(parts))  # only reached when the stream completed
+    if sem is not None:
+        sem.add(qv, scope, "".join(shown))
     if verbose:
         print("[rag][qa] LLM response received.")
-    return content
\ No newline at end of file
+
+
+def _parse_batch(content: str, n: int) -> Optional[List[str]]:
+    """Answers 1..n from a batch reply, or None if any is missing or malformed."""
+    try:
+        entries = _loads(content)["answers"]
+        texts = {int(e["id"]): e["text"] for e in entries}
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not all(isinstance(texts.get(i), str) for i in range(1, n + 1)):
+        return None
+    return [texts[i] for i in range(1, n + 1)]
+
+
+def answer_with_llm_batch(
+    questions: List[str],
+    retrieveds: List[List[Tuple[float, str, int]]],
+    *,
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    citations: str = "inline",
+    batch_size: int = BATCH_SIZE,
+    verbose: bool = False,
+) -> List[str]:
+    """Like `answer_with_llm` for many questions, `batch_size` per request."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    OpenAI = _openai_cls() if api_key else None
+    if OpenAI is None:
+        if verbose:
+            print("[rag][qa] LLM unavailable (no API key or SDK); falling back to offline summary")
+        return [answer_offline(q, r, citations=citations, verbose=verbose) for q, r in zip(questions, retrieveds)]
+
+    model = model or os.getenv("MODEL", "gpt-4o-mini")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE")
+    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+    system = system_prompt(citations)
+
+    answers = ["I couldn't find anything relevant in the index."] * len(questions)
+    todo = []
+    for i, r in enumerate(retrieveds):
+        if r and _confident(r):
+            answers[i] = _answer_confident(questions[i], r, citations, verbose)
+        elif r:
+            todo.append(i)
+    for start in range(0, len(todo), max(1, batch_size)):
+        group = todo[start:start + max(1, batch_size)]
+        prompt = batch_rag_prompt([(questions[i], build_context(retrieveds[i])) for i in group])
+        if verbose:
+            print(f"[rag][qa] LLM batch model={model} questions={len(group)} prompt_len chars={len(prompt)}")
+        resp = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        texts = _parse_batch(resp.choices[0].message.content or "", len(group))
+        if texts is None:
+            if verbose:
+                print("[rag][qa] batch reply unparseable; answering its questions one by one")
+            for i in group:
+                answers[i] = answer_with_llm(questions[i], retrieveds[i], model=model, base_url=base_url,
+                                             citations=citations, verbose=verbose)
+            continue
+        for i, text in zip(group, texts):
+            answers[i] = _apply_citations(text, retrieveds[i], citations)
+    return answers
+
+
+def _hedge_delay() -> Optional[float]:
+    value = os.getenv("RAG_LLM_HEDGE_DELAY")
+    return float(value) if value else None
+
+
+async def _hedged(call, delay: Optional[float]):
+    """Await `call()`; if it hasn't finished after `delay` seconds, start a
+    second copy and return whichever succeeds first (the other is cancelled)."""
+    first = asyncio.ensure_future(call())
+    if not delay:
+        return await first
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            pending.add(asyncio.ensure_future(call()))
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            ok = [t for t in done if t.exception() is None]
+            if ok or not pending:
+                return (ok or list(done))[0].result()  # raises if every copy failed
+    finally:
+        for t in pending:
+            t.cancel()
+
+
+async def answer_with_llm_async(
+    question: str,
+    retrieved: List[Tuple[float, str, int]],
+    *,
+    client: Any,
+    model: str,
+    base_url: Optional[str] = None,
+    citations: str = "inline",
+    semaphore: Optional[asyncio.Semaphore] = None,
+    hedge_after: Optional[float] = None,
+    verbose: bool = False,
+) -> str:
+    """`answer_with_llm` on an `AsyncOpenAI` client; `semaphore` bounds requests
+    in flight, `hedge_after` enables a hedged second request (see module doc)."""
+    if not retrieved:
+        return "I couldn't find anything relevant in the index."
+    if _confident(retrieved):
+        return _answer_confident(question, retrieved, citations, verbose)
+
+    system, prompt = system_prompt(citations), rag_prompt(question, build_context(retrieved))
+    key = _cache_key(model, base_url or "", system, prompt)
+    content = _LLM_CACHE.get(key)
+    if content is None:
+        def call():
+            return client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0,
+            )
+
+        async with semaphore or asyncio.Semaphore(1):
+            resp = await _hedged(call, hedge_after)
+        content = resp.choices[0].message.content or ""
+        _LLM_CACHE.put(key, content)
+    elif verbose:
+        print(f"[rag][qa] LLM response served from cache for '{preview(question, 80)}'.")
+    return _apply_citations(content, retrieved, citations)
+
+
+async def answer_many(
+    questions: List[str],
+    retrieveds: List[List[Tuple[float, str, int]]],
+    *,
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    citations: str = "inline",
+    concurrency: int = 8,
+    hedge_after: Optional[float] = None,
+    verbose: bool = False,
+) -> List[str]:
+    """Answer independent questions concurrently; results keep input order.
+    Run from sync code with `asyncio.run(answer_many(...))`."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    AsyncOpenAI = _async_openai_cls() if api_key else None
+    if AsyncOpenAI is None:
+        if verbose:
+            print("[rag][qa] LLM unavailable (no API key or SDK); falling back to offline summary")
+        return [answer_offline(q, r, citations=citations, verbose=verbose) for q, r in zip(questions, retrieveds)]
+
+    model = model or os.getenv("MODEL", "gpt-4o-mini")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE")
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url) if base_url else AsyncOpenAI(api_key=api_key)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    hedge_after = hedge_after if hedge_after is not None else _hedge_delay()
+    if verbose:
+        print(f"[rag][qa] LLM synthesis model={model} questions={len(questions)} concurrency={concurrency}")
+    return list(await asyncio.gather(*(
+        answer_with_llm_async(q, r, client=client, model=model, base_url=base_url, citations=citations,
+                              semaphore=semaphore, hedge_after=hedge_after, verbose=verbose)
+        for q, r in zip(questions, retrieveds)
+    )))
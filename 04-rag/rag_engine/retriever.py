@@ -9,40 +9,107 @@ stored vectorizer to transform the query) and SBERT (model encodes query).
 
 FUNCTIONS
 ---------
-- `query_to_vector(index, text)` → np.ndarray (1, D)
+- `query_to_vector(index, text)` → (1, D): CSR for TF-IDF/hashing, ndarray for SBERT;
+  the last 4096 questions per vectorizer (TF-IDF) or per process (SBERT)
+  are remembered, so a repeated question isn't embedded again
 - `search(index, query, k=4)` → list[(score: float, chunk: str, idx: int)]
+  (uses the index's FAISS graph when it was built with `--ann`)
+- `warmup(index)` → load what the first query would (SBERT model, FAISS
+  index) ahead of time; the SBERT encoder is built once per process.
 """
 
 from __future__ import annotations
-from typing import List, Tuple
+from collections import OrderedDict
+from typing import Any, List, Tuple
+import functools
+import weakref
 import numpy as np
 
-from embeddings import TfidfEmbedding, SbertEmbedding, cosine_sim
+from embeddings import TfidfEmbedding, SbertEmbedding, ann_search, cosine_sim, sparse_query_scores, tfidf_query_coords
+
+
+@functools.lru_cache(maxsize=1)
+def _sbert_encoder() -> SbertEmbedding:
+    # loading the transformer dominates an SBERT query; do it once per process
+    return SbertEmbedding()
+
+
+_QUERY_CACHE_SIZE = 4096
+
+# per vectorizer (vocabularies differ between indexes); dropped with it
+_TFIDF_QUERIES: "weakref.WeakKeyDictionary[Any, OrderedDict]" = weakref.WeakKeyDictionary()
+
+
+def _tfidf_query(vectorizer, text: str):
+    cache = _TFIDF_QUERIES.get(vectorizer)
+    if cache is None:
+        cache = _TFIDF_QUERIES[vectorizer] = OrderedDict()
+    vec = cache.get(text)
+    if vec is None:
+        vec = cache[text] = vectorizer.transform([text]).astype("float32")
+        if len(cache) > _QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(text)
+    return vec
+
+
+@functools.lru_cache(maxsize=_QUERY_CACHE_SIZE)
+def _sbert_query(text: str) -> np.ndarray:
+    vec = _sbert_encoder().transform([text])
+    vec.flags.writeable = False  # shared between callers
+    return vec
+
+
+def warmup(index) -> None:
+    if index.get("meta", {}).get("emb") == "sbert":
+        _sbert_encoder()
+    if index.get("meta", {}).get("ann"):
+        from indexer import load_ann
+
+        load_ann(index)
 
 
 def query_to_vector(index, text: str) -> np.ndarray:
     meta = index.get("meta", {})
     emb = meta.get("emb")
-    if emb == "tfidf":
+    if emb in ("tfidf", "hashing"):
         tfidf = index.get("tfidf_vectorizer")
         if tfidf is None:
             raise RuntimeError("TF-IDF vectorizer missing from index")
-        vec = tfidf.transform([text]).astype("float32").toarray()
-        return vec
+        # cached CSR; stays sparse (a query has tens of terms, rows are
+        # vocabulary- or 2**18-wide), and callers get their own copy
+        return _tfidf_query(tfidf, text).copy()
     elif emb == "sbert":
-        # lazy construct SBERT encoder (index stores no model to keep pickle light)
-        enc = SbertEmbedding()
-        return enc.transform([text])
+        # index stores no model to keep it light; the encoder is built on first use
+        return _sbert_query(text).view()
     else:
         raise ValueError(f"Unknown embedding backend: {emb}")
 
 
 def search(index, query: str, k: int = 4) -> List[Tuple[float, str, int]]:
+    meta = index.get("meta", {})
     vectors = index["vectors"]  # (N, D)
-    qv = query_to_vector(index, query)  # (1, D)
-    sims = cosine_sim(qv, vectors)[0]  # (N,)
-    order = np.argsort(-sims)
+    normalized = bool(meta.get("normalized"))
+    if meta.get("emb") == "tfidf" and normalized and index.get("tfidf_vectorizer") is not None:
+        # sparse query coords against unit rows: no sklearn transform, no 1×D densify
+        idx, vals = tfidf_query_coords(index["tfidf_vectorizer"], query)
+        sims = sparse_query_scores(vectors, idx, vals, index.get("scales"))
+    else:
+        qv = query_to_vector(index, query)  # (1, D)
+        if meta.get("ann"):
+            from indexer import load_ann
+
+            scores, ids = ann_search(load_ann(index), qv, max(1, k))
+            return [(float(s), index["chunks"][i], int(i)) for s, i in zip(scores, ids)]
+        sims = cosine_sim(qv, vectors, b_normalized=normalized, b_scales=index.get("scales"))[0]  # (N,)
+    # top-k without sorting all N: O(N) partition, then sort the k winners
+    k = min(max(1, k), sims.shape[0])
+    if k == 0:
+        return []
+    part = np.argpartition(-sims, k - 1)[:k]
+    order = part[np.argsort(-sims[part], kind="stable")]
     results: List[Tuple[float, str, int]] = []
-    for i in order[: max(1, k)]:
+    for i in order:
         results.append((float(sims[i]), index["chunks"][i], int(i)))
     return results
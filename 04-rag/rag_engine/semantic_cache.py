@@ -0,0 +1,107 @@
+"""
+Section 4 — Semantic answer cache (paraphrased questions)
+
+OVERVIEW
+--------
+The exact-match LLM cache in `qa.py` misses paraphrases ("What are the
+holidays?" vs "List the holidays"). This cache embeds the question with the
+index's SBERT model and returns a previous answer when the best cosine
+against earlier questions is ≥ `threshold` (0.88).
+
+Only dense (SBERT) indexes get a cache. In a TF-IDF space, words outside the
+vocabulary vanish from the question vector, so "Is Nowruz a holiday?" and
+"Is Christmas a holiday?" come out identical: a hit there would answer a
+different question.
+
+DESIGN
+------
+- One cache per loaded index, tied to the life of `index["vectors"]`: a
+  reloaded index (new vocabulary, new vector space) starts empty.
+- Entries are scoped by (model, base URL, citations mode, retrieved chunk
+  ids): a refs-mode answer is never returned for an inline-mode question,
+  and a question that retrieves other chunks (or another `top_k`) never
+  gets an answer, or a Sources block, built from different context.
+- Lookups are a single matmul over the stored unit rows; at the sizes an
+  in-process cache reaches (≤ `maxsize` questions) that beats building an
+  ANN index.
+- In-process only: it pays off under `rag serve`, where the index and the
+  cache outlive a single question.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import weakref
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import norm as sparse_norm
+
+DEFAULT_THRESHOLD = 0.88
+
+_CACHES: Dict[int, "SemanticCache"] = {}
+
+
+def question_vector(index: Dict[str, Any], text: str):
+    """Unit-length (1, D) embedding of `text` in the index's space."""
+    from retriever import query_to_vector
+
+    vec = query_to_vector(index, text)
+    norm = sparse_norm(vec) if sparse.issparse(vec) else np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def _empty(qv) -> bool:
+    return qv.nnz == 0 if sparse.issparse(qv) else not np.any(qv)
+
+
+class _Scope:
+    __slots__ = ("rows", "answers", "matrix")
+
+    def __init__(self):
+        self.rows: List[Any] = []
+        self.answers: List[str] = []
+        self.matrix = None  # stacked rows, rebuilt lazily after an add
+
+
+class SemanticCache:
+    """Answers keyed by question embeddings; hit when cosine ≥ threshold."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, maxsize: int = 512):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._scopes: Dict[Tuple, _Scope] = {}
+
+    def lookup(self, qv, scope: Tuple) -> Optional[str]:
+        s = self._scopes.get(scope)
+        if s is None or not s.rows or _empty(qv):
+            return None
+        if s.matrix is None:
+            s.matrix = sparse.vstack(s.rows, format="csr") if sparse.issparse(qv) else np.vstack(s.rows)
+        sims = s.matrix @ qv.T
+        sims = np.asarray(sims.todense() if sparse.issparse(sims) else sims).ravel()
+        best = int(np.argmax(sims))
+        return s.answers[best] if sims[best] >= self.threshold else None
+
+    def add(self, qv, scope: Tuple, answer: str) -> None:
+        if _empty(qv):  # no known terms: would never match anything
+            return
+        s = self._scopes.setdefault(scope, _Scope())
+        s.rows.append(qv)
+        s.answers.append(answer)
+        if len(s.rows) > self.maxsize:
+            del s.rows[0], s.answers[0]
+        s.matrix = None
+
+
+def for_index(index: Dict[str, Any]) -> Optional[SemanticCache]:
+    """The cache belonging to this loaded index (created on first use), or
+    None for sparse (TF-IDF / hashing) indexes, which don't get one."""
+    if index.get("meta", {}).get("emb") != "sbert":
+        return None
+    vectors = index["vectors"]
+    key = id(vectors)
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = SemanticCache()
+        weakref.finalize(vectors, _CACHES.pop, key, None)
+    return cache
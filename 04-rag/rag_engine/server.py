@@ -0,0 +1,179 @@
+"""
+Section 4 — Query server (load an index once, answer over a Unix socket)
+
+OVERVIEW
+--------
+`rag query` pays for loading the index on every call. `rag serve --index P`
+loads it once and answers requests on a Unix socket whose path is derived
+from the index path, and `rag query` tries that socket before falling back
+to a cold load. The server reloads the index when its files change on disk.
+
+PROTOCOL
+--------
+One request per connection, one JSON object per line each way:
+
+  → {"q": str, "top_k": int, "llm": bool, "citations": "inline"|"refs"|"none"}
+  ← {"ok": true, "answer": str}  |  {"ok": false, "error": str}
+
+The LLM model and endpoint come from the server's own environment (MODEL,
+OPENAI_BASE_URL), never from a request: the server holds the API key, and a
+client must not be able to send it to a host of its choosing. `rag query`
+with --model/--base-url therefore answers locally.
+
+ACCESS
+------
+The socket lives in a private per-user directory ($XDG_RUNTIME_DIR, or
+`<tmp>/rag-<uid>` created 0700) and is itself 0600. `ask` only talks to a
+socket owned by the calling user, so another local user can't stand in for
+the server and answer (or read) your questions.
+
+Unix sockets only (not available on Windows builds without AF_UNIX).
+Vectors are not copied into shared memory: the index directory's
+`vectors.npy` is already mmap'd, so the page cache is shared anyway.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+
+_CONNECT_TIMEOUT = 0.5
+_RELOAD_TRIES = 3
+
+
+def _socket_dir() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    d = os.path.join(tempfile.gettempdir(), f"rag-{os.getuid()}")
+    try:
+        os.mkdir(d, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(d)  # in a shared /tmp: someone else may have made it first
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{d} is not a private directory of this user")
+    return d
+
+
+def socket_path(index_path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(index_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(_socket_dir(), f"rag-{key}.sock")
+
+
+def _index_stamp(index_path: str) -> Tuple[int, int]:
+    # meta.json is the last file a directory save writes; a .pkl is one file.
+    p = os.path.join(index_path, "meta.json") if os.path.isdir(index_path) else index_path
+    st = os.stat(p)
+    return st.st_mtime_ns, st.st_size
+
+
+def answer(index: Dict[str, Any], req: Dict[str, Any]) -> str:
+    from retriever import search
+    from qa import answer_offline, answer_with_llm
+
+    q = req["q"]
+    citations = req.get("citations", "refs")
+    hits = search(index, q, k=int(req.get("top_k", 4)))
+    if req.get("llm"):  # model/endpoint: the server's environment only
+        return answer_with_llm(q, hits, citations=citations, index=index)
+    return answer_offline(q, hits, citations=citations)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            req = json.loads(self.rfile.readline())
+            reply = {"ok": True, "answer": answer(self.server.current_index(), req)}
+        except Exception as e:  # report to the client instead of killing the server
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class IndexServer(socketserver.UnixStreamServer):
+    def __init__(self, index_path: str, sock_path: str, *, verbose: bool = False):
+        self.index_path = index_path
+        self.verbose = verbose
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._index: Optional[Dict[str, Any]] = None
+        self.current_index()
+        if os.path.exists(sock_path):
+            os.unlink(sock_path)  # left behind by a server that didn't exit cleanly
+        super().__init__(sock_path, _Handler)
+
+    def current_index(self) -> Dict[str, Any]:
+        from indexer import load_index
+        from retriever import warmup
+
+        stamp = _index_stamp(self.index_path)
+        if stamp == self._stamp:
+            return self._index
+        if self.verbose:
+            print(f"[rag][serve] loading index={self.index_path}")
+        # A save that lands while we read leaves a mix of old and new files:
+        # load again until the stamp holds still across the read.
+        for _ in range(_RELOAD_TRIES):
+            try:
+                index = load_index(self.index_path)
+            except Exception:
+                if self._index is None:
+                    raise
+                index = None  # torn mid-save; try again below
+            after = _index_stamp(self.index_path)
+            if index is not None and after == stamp:
+                break
+            stamp = after
+        else:
+            if self._index is None:
+                raise RuntimeError(f"index at {self.index_path} kept changing while loading")
+            return self._index  # keep serving the old one; retry on the next request
+        self._index, self._stamp = index, stamp
+        warmup(index)  # pay model/ANN loading here, not on the first question
+        return index
+
+    def server_bind(self) -> None:
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def make_server(index_path: str, sock_path: Optional[str] = None, *, verbose: bool = False) -> IndexServer:
+    return IndexServer(index_path, sock_path or socket_path(index_path), verbose=verbose)
+
+
+def ask(index_path: str, req: Dict[str, Any], sock_path: Optional[str] = None) -> Optional[str]:
+    """Send one request to a running server; None if no server is listening
+    (or the socket isn't one of this user's)."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        path = sock_path or socket_path(index_path)
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(_CONNECT_TIMEOUT)
+            s.connect(path)
+            s.settimeout(None)  # answering (e.g. an LLM call) may take a while
+            s.sendall(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+            with s.makefile("rb") as f:
+                reply = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "server error"))
+    return reply["answer"]
@@ -5,7 +5,7 @@ TEST_DIR = os.path.dirname(__file__)
 ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
 if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
 
-from chunking import split_sentences, make_chunks, chunk_text
+from chunking import split_sentences, make_chunks, chunk_text, chunk_pages
 
 
 def test_split_sentences_en_basic():
@@ -15,6 +15,16 @@ def test_split_sentences_en_basic():
     assert s[0].startswith("Hello world")
 
 
+def test_split_sentences_fa_terminators():
+    import fa.chunking as fa
+    if fa._HAZM:  # hazm has its own segmentation rules
+        return
+    t = "این چیست؟ یک کتاب۔ تمام… ok"
+    s = split_sentences(t, lang="fa")
+    assert len(s) == 4
+    assert s[0] == "این چیست؟"
+
+
 def test_make_chunks_overlap():
     sents = [f"s{i}" for i in range(10)]
     chunks = make_chunks(sents, chunk_size=3, overlap=1)
@@ -26,3 +36,43 @@ def test_chunk_text_pipeline():
     t = "One two three. Four five six seven. Eight nine."
     chunks = chunk_text(t, lang="en", chunk_size=4, overlap=2)
     assert len(chunks) >= 2
+
+
+def test_make_chunks_overlap_spans_sentences():
+    sents = ["a b", "c", "d e f"]
+    chunks = make_chunks(sents, chunk_size=3, overlap=2)
+    # the tail of "a b c" crosses the sentence boundary
+    assert chunks == ["a b c", "b c d e f"]
+
+
+def test_chunk_pages_matches_joined_text():
+    pages = ["One two three. Four five", "six seven. Eight nine.", "Ten eleven twelve."]
+    for lang in ("en", "fa"):
+        joined = chunk_text("\n".join(pages), lang=lang, chunk_size=4, overlap=2)
+        assert list(chunk_pages(pages, lang=lang, chunk_size=4, overlap=2)) == joined
+
+
+def test_chunk_pages_long_sentence_across_pages():
+    # Page joins may differ in whitespace, never in words
+    pages = ["alpha beta", "  gamma", "", "delta\tepsilon ", "zeta. eta", "theta"] * 50
+    for lang in ("en", "fa"):
+        joined = chunk_text("\n".join(pages), lang=lang, chunk_size=8, overlap=3)
+        streamed = chunk_pages(pages, lang=lang, chunk_size=8, overlap=3)
+        assert [c.split() for c in streamed] == [c.split() for c in joined]
+
+
+def test_iter_sentences_rescans_only_new_page():
+    from _chunking_core import _iter_sentences
+    from en.chunking import _sentence_split_en
+
+    scanned = []
+
+    def split(text):
+        scanned.append(len(text))
+        return _sentence_split_en(text)
+
+    pages = ["word " * 10] * 200
+    sents = list(_iter_sentences(pages, split))
+    assert len(sents) == 1 and sents[0].split() == ["word"] * 2000
+    # one terminator-less sentence across 200 pages: no page re-splits the carry
+    assert max(scanned) < 2 * len(pages[0]) + 2
@@ -21,3 +21,267 @@ def test_index_and_search_tfidf():
     # Ensure the top hit references Holidays/Nowruz
     top = hits[0][1].lower()
     assert "holiday" in top or "nowruz" in top
+
+
+
+def test_search_top_k_matches_full_sort():
+    import numpy as np
+    from embeddings import cosine_sim
+    from retriever import query_to_vector
+
+    text = " ".join(f"Topic {i} covers leave, holidays and benefits item {i}." for i in range(40))
+    idx = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    q = "holidays and leave benefits"
+    sims = cosine_sim(query_to_vector(idx, q), idx["vectors"])[0]
+    for k in (1, 3, len(idx["chunks"]) + 5):
+        hits = search(idx, q, k=k)
+        assert len(hits) == min(k, len(idx["chunks"]))
+        assert np.allclose([s for s, _, _ in hits], np.sort(sims)[::-1][: len(hits)], atol=1e-6)
+
+def test_normalized_index_scores_match_cosine():
+    import numpy as np
+    from embeddings import cosine_sim
+    from retriever import query_to_vector
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    idx = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    assert idx["meta"]["normalized"] is True
+    qv = query_to_vector(idx, "request leave for holidays")
+    fast = cosine_sim(qv, idx["vectors"], b_normalized=True)
+    assert fast.shape == (1, len(idx["chunks"]))
+    assert np.allclose(fast, cosine_sim(qv, idx["vectors"]), atol=1e-6)
+
+
+
+def test_dense_single_query_gemv_matches_sklearn():
+    import numpy as np
+    from sklearn.metrics.pairwise import cosine_similarity
+    from embeddings import _l2_rows, cosine_sim
+
+    rng = np.random.default_rng(0)
+    b = _l2_rows(rng.standard_normal((50, 16)).astype(np.float32))
+    a = rng.standard_normal((1, 16)).astype(np.float32)
+    fast = cosine_sim(a, b, b_normalized=True)
+    assert fast.shape == (1, 50)
+    assert np.allclose(fast, cosine_similarity(a, b), atol=1e-5)
+
+def test_hashing_backend_search_and_parallel_counts(tmp_path):
+    import numpy as np
+    from embeddings import HashingTfidfEmbedding
+    from indexer import save_index, load_index
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    idx = build_index(text, lang="en", emb_name="hashing", chunk_size=8, overlap=2)
+    save_index(idx, str(tmp_path / "index"))
+    hits = search(load_index(str(tmp_path / "index")), "What are the holidays?", k=2)
+    assert "holiday" in hits[0][1].lower()
+
+    emb = HashingTfidfEmbedding(n_jobs=2)
+    emb.PARALLEL_MIN_TEXTS = 1
+    texts = idx["chunks"] * 3
+    serial = HashingTfidfEmbedding(n_jobs=1)._counts(texts)
+    assert np.array_equal(emb._counts(texts).toarray(), serial.toarray())
+
+
+def test_tfidf_query_coords_match_sklearn_transform():
+    import numpy as np
+    from embeddings import tfidf_query_coords
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    vec = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)["tfidf_vectorizer"]
+    for q in ("What are the holidays?", "holidays holidays leave policy", "nothing known"):
+        ref = vec.transform([q])
+        ref.sort_indices()
+        idx, vals = tfidf_query_coords(vec, q)
+        assert list(idx) == list(ref.indices)
+        assert np.allclose(vals, ref.data)
+
+
+def test_int8_index_ranks_like_float(tmp_path):
+    import numpy as np
+    from embeddings import cosine_sim, quantize_int8
+    from indexer import save_index, load_index
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    q = "What are the holidays?"
+    ref = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    idx = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2, int8=True)
+    assert idx["vectors"].dtype == np.int8 and idx["meta"]["int8"] is True
+    save_index(idx, str(tmp_path / "index"))
+    loaded = load_index(str(tmp_path / "index"))
+    assert [h[2] for h in search(loaded, q, k=3)] == [h[2] for h in search(ref, q, k=3)]
+
+    dense = np.random.default_rng(0).standard_normal((50, 16)).astype(np.float32)
+    dense /= np.linalg.norm(dense, axis=1, keepdims=True)
+    qv, scales = quantize_int8(dense)
+    fast = cosine_sim(dense[:1], qv, b_scales=scales)
+    assert np.allclose(fast, cosine_sim(dense[:1], dense), atol=0.02)
+
+
+def test_ann_rejects_sparse_backend():
+    import pytest
+
+    with pytest.raises(ValueError):
+        build_index("One two. Three four.", emb_name="tfidf", ann="hnsw")
+
+
+def test_faiss_flat_matches_exact_scan():
+    import numpy as np
+    import pytest
+    pytest.importorskip("faiss")
+    from embeddings import ann_search, build_ann, cosine_sim
+
+    x = np.random.default_rng(0).standard_normal((200, 32)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    scores, ids = ann_search(build_ann(x, "flat"), x[:1], 5)
+    exact = cosine_sim(x[:1], x, b_normalized=True)[0]
+    assert list(ids) == list(np.argsort(-exact)[:5])
+    assert np.allclose(scores, exact[ids], atol=1e-5)
+
+    assert not hasattr(build_ann(x, "hnsw"), "hnsw")  # too small for a graph
+
+    scores, ids = ann_search(build_ann(x, "sq8"), x[:1], 5)
+    assert ids[0] == 0 and np.allclose(scores, exact[ids], atol=0.05)
+
+
+def test_index_dir_roundtrip_matches_pickle(tmp_path):
+    from indexer import save_index, load_index
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    idx = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    save_index(idx, str(tmp_path / "index"))
+    save_index(idx, str(tmp_path / "index.pkl"))
+    assert (tmp_path / "index" / "vectors.npz").exists()  # TF-IDF stays sparse
+    assert not (tmp_path / "index" / "extra.pkl").exists()
+
+    from_dir = load_index(str(tmp_path / "index"))
+    from_pkl = load_index(str(tmp_path / "index.pkl"))
+    assert from_dir["meta"] == idx["meta"]
+    assert from_dir["chunks"] == idx["chunks"]
+    q = "What are the holidays?"
+    assert search(from_dir, q, k=2) == search(from_pkl, q, k=2) == search(idx, q, k=2)
+
+
+def test_pickle_index_buffers_out_of_band(tmp_path):
+    import pickle
+    import numpy as np
+    from indexer import save_index, load_index
+
+    idx = {"meta": {"emb": "sbert"}, "chunks": ["a", "b"], "vectors": np.eye(2, dtype=np.float32)}
+    save_index(idx, str(tmp_path / "new.pkl"))
+    loaded = load_index(str(tmp_path / "new.pkl"))
+    assert loaded["chunks"] == idx["chunks"]
+    assert np.array_equal(loaded["vectors"], idx["vectors"])
+    vec = loaded["vectors"]
+    assert not vec.flags.owndata and vec.ctypes.data % 64 == 0  # on the mapped file, aligned
+    vec[0, 0] = 5.0  # copy-on-write: writable, the file is untouched
+    assert load_index(str(tmp_path / "new.pkl"))["vectors"][0, 0] == 1.0
+    save_index(loaded, str(tmp_path / "new.pkl"))  # overwrite the file it is mapped from
+    assert load_index(str(tmp_path / "new.pkl"))["vectors"][0, 0] == 5.0
+
+    with open(tmp_path / "old.pkl", "wb") as f:  # plain pickles still load
+        pickle.dump(idx, f)
+    assert load_index(str(tmp_path / "old.pkl"))["chunks"] == idx["chunks"]
+
+
+def test_iter_path_texts_walks_directory_in_order(tmp_path):
+    import shutil
+    from indexer import ingest_pdf, iter_path_texts
+
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a.txt").write_text("first file.", encoding="utf-8")
+    (tmp_path / "b" / "c.md").write_text("nested file.", encoding="utf-8")
+    (tmp_path / ".skip.txt").write_text("hidden", encoding="utf-8")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+    pdf = os.path.join(ROOT_DIR, "samples", "fa_handbook.pdf")
+    shutil.copy(pdf, tmp_path / "b" / "d.pdf")
+
+    texts = list(iter_path_texts([str(tmp_path)]))
+    assert texts[:2] == ["first file.", "nested file."]
+    assert "\n".join(texts[2:]) == ingest_pdf(pdf)
+
+
+def test_ingest_pdf_parallel_matches_serial(monkeypatch):
+    import indexer
+
+    pdf = os.path.join(ROOT_DIR, "samples", "fa_handbook.pdf")
+    serial = indexer.ingest_pdf(pdf)
+    monkeypatch.setattr(indexer, "PARALLEL_MIN_PAGES", 1)
+    monkeypatch.setattr(indexer, "_PAGES_PER_TASK", 3)
+    assert indexer.ingest_pdf(pdf, workers=2) == serial
+
+
+def test_sbert_encoder_built_once_per_process(monkeypatch):
+    import numpy as np
+    import retriever
+
+    built = []
+
+    class FakeSbert:
+        def __init__(self):
+            built.append(self)
+
+        def transform(self, texts):
+            return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+    monkeypatch.setattr(retriever, "SbertEmbedding", FakeSbert)
+    retriever._sbert_encoder.cache_clear()
+    retriever._sbert_query.cache_clear()
+    try:
+        vectors = np.eye(4, dtype=np.float32)
+        idx = {"meta": {"emb": "sbert", "normalized": True}, "chunks": list("abcd"), "vectors": vectors}
+        retriever.warmup(idx)
+        search(idx, "one", k=2)
+        search(idx, "two", k=2)
+        assert len(built) == 1
+        assert retriever._sbert_query.cache_info().misses == 2
+        search(idx, "two", k=2)
+        assert retriever._sbert_query.cache_info().hits == 1
+        assert not retriever.query_to_vector(idx, "two").flags.writeable
+    finally:
+        retriever._sbert_encoder.cache_clear()
+        retriever._sbert_query.cache_clear()
+
+
+def test_chunk_store_roundtrips_and_resaves_in_place(tmp_path):
+    import pytest
+    from indexer import ChunkStore, save_index, load_index
+
+    chunks = ["alpha", "", "تعطیلات نوروز", "beta…"]
+    store = ChunkStore.from_texts(chunks)
+    assert len(store) == 4 and list(store) == chunks and store == chunks
+    assert store[-2] == chunks[-2] and store[1:3] == chunks[1:3]
+    with pytest.raises(IndexError):
+        store[4]
+    assert ChunkStore.from_texts([]) == []
+
+    idx = build_index("Holidays include Nowruz. Vacation policy allows carryover.", chunk_size=4, overlap=1)
+    path = str(tmp_path / "index")
+    save_index(idx, path)
+    assert (tmp_path / "index" / "chunks.npy").exists() and not (tmp_path / "index" / "chunks.json").exists()
+    loaded = load_index(path)
+    assert isinstance(loaded["chunks"], ChunkStore) and loaded["chunks"] == idx["chunks"]
+    save_index(loaded, path)  # overwrite the files the loaded store is mapped from
+    assert load_index(path)["chunks"] == idx["chunks"]
+    save_index(loaded, str(tmp_path / "copy.pkl"))
+    assert load_index(str(tmp_path / "copy.pkl"))["chunks"] == idx["chunks"]
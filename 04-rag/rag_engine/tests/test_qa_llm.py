@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import os, sys
+TEST_DIR = os.path.dirname(__file__)
+ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
+if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
+
+import json
+from types import SimpleNamespace
+
+import qa
+
+RETRIEVED = [
+    (0.9, "Holidays include Nowruz and national days.", 0),
+    (0.7, "Vacation policy allows carryover.", 1),
+]
+
+
+def _fake_openai(calls, reply=lambda kwargs: "Nowruz [chunk:0]."):
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+        def _create(self, **kwargs):
+            calls.append(kwargs)
+            msg = SimpleNamespace(content=reply(kwargs))
+            return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+    return FakeOpenAI
+
+
+def test_llm_responses_are_cached(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls))
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache(path=str(tmp_path / "llm.sqlite")))
+
+    first = qa.answer_with_llm("What are the holidays?", RETRIEVED, model="m", citations="inline")
+    again = qa.answer_with_llm("What are the holidays?", RETRIEVED, model="m", citations="inline")
+    assert first == again == "Nowruz [chunk:0]."
+    assert len(calls) == 1
+
+    # a fresh process (empty memory) still hits the SQLite file
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache(path=str(tmp_path / "llm.sqlite")))
+    qa.answer_with_llm("What are the holidays?", RETRIEVED, model="m", citations="inline")
+    assert len(calls) == 1
+
+    qa.answer_with_llm("What are the holidays?", RETRIEVED, model="other", citations="inline")
+    assert len(calls) == 2
+
+
+def test_semantic_cache_serves_paraphrases_per_citations_mode(monkeypatch):
+    import numpy as np
+    import retriever
+
+    def embed(text):
+        # stand-in for SBERT: holiday questions share a direction
+        vec = np.array([[1.0, 0.1, 0.0]] if "holiday" in text.lower() else [[0.0, 0.2, 1.0]], dtype=np.float32)
+        vec.flags.writeable = False
+        return vec
+
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls))
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+    monkeypatch.setattr(retriever, "_sbert_query", embed)
+    index = {"meta": {"emb": "sbert", "normalized": True}, "chunks": ["a", "b"], "vectors": np.eye(2, 3, dtype=np.float32)}
+
+    qa.answer_with_llm("What are the holidays?", RETRIEVED, model="m", citations="inline", index=index)
+    hit = qa.answer_with_llm("List the HOLIDAYS", RETRIEVED, model="m", citations="inline", index=index)
+    assert hit == "Nowruz [chunk:0]."
+    assert len(calls) == 1
+
+    qa.answer_with_llm("List the holidays", RETRIEVED, model="m", citations="refs", index=index)
+    assert len(calls) == 2
+    qa.answer_with_llm("List the holidays", RETRIEVED[:1], model="m", citations="inline", index=index)
+    assert len(calls) == 3  # other top_k / chunks: not the same context
+    qa.answer_with_llm("How does vacation carryover work?", RETRIEVED, model="m", citations="inline", index=index)
+    assert len(calls) == 4
+
+
+def test_semantic_cache_off_for_tfidf_out_of_vocabulary_paraphrase(monkeypatch):
+    from indexer import build_index
+
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls))
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+    index = build_index(
+        "Company holidays include Nowruz and national days. Is remote work allowed? Vacation allows carryover.",
+        lang="en", emb_name="tfidf", chunk_size=8, overlap=2,
+    )
+
+    # "Christmas" is not in the vocabulary: both questions embed identically
+    qa.answer_with_llm("Is Nowruz a holiday?", RETRIEVED, model="m", citations="inline", index=index)
+    qa.answer_with_llm("Is Christmas a holiday?", RETRIEVED, model="m", citations="inline", index=index)
+    assert len(calls) == 2
+
+
+def test_batch_answers_many_questions_per_request(monkeypatch):
+    def reply(kwargs):
+        if "response_format" not in kwargs:
+            return "single [chunk:1]"
+        n = kwargs["messages"][1]["content"].count("\nCONTEXT")
+        return json.dumps({"answers": [{"id": i, "text": f"answer {i} [chunk:0]"} for i in range(1, n + 1)]})
+
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls, reply))
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+
+    qs = ["q1?", "q2?", "q3?", "q4?", "q5?"]
+    rs = [RETRIEVED, RETRIEVED, [], RETRIEVED, RETRIEVED]
+    out = qa.answer_with_llm_batch(qs, rs, model="m", citations="none", batch_size=3)
+    assert len(calls) == 2  # the question with no hits is not sent
+    assert out[0] == "answer 1 " and out[3] == "answer 3 " and out[4] == "answer 1 "
+    assert out[2] == "I couldn't find anything relevant in the index."
+
+    calls.clear()
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls, lambda kw: "not json" if "response_format" in kw else "single [chunk:1]"))
+    out = qa.answer_with_llm_batch(qs[:2], rs[:2], model="m", citations="inline")
+    assert out == ["single [chunk:1]", "single [chunk:1]"]
+    assert len(calls) == 3  # one batch attempt, then one call per question
+
+
+def test_answer_many_runs_requests_concurrently(monkeypatch):
+    import asyncio
+
+    state = {"live": 0, "peak": 0, "calls": 0}
+
+    class FakeAsyncOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+        async def _create(self, **kwargs):
+            state["calls"] += 1
+            state["live"] += 1
+            state["peak"] = max(state["peak"], state["live"])
+            await asyncio.sleep(0.01)
+            state["live"] -= 1
+            question = kwargs["messages"][1]["content"].rsplit("Question:", 1)[1].split()[0]
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"{question} [chunk:0]"))])
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_async_openai_cls", lambda: FakeAsyncOpenAI)
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+
+    qs = [f"q{i}" for i in range(6)]
+    out = asyncio.run(qa.answer_many(qs, [RETRIEVED] * 6, model="m", citations="none", concurrency=3))
+    assert out == [f"{q} " for q in qs]
+    assert state["calls"] == 6 and state["peak"] == 3
+
+
+def test_stream_yields_pieces_that_join_to_the_full_answer(monkeypatch):
+    pieces = ["Nowruz [ch", "unk:0] and", " national days [chunk:1].", "  \n"]
+
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        return iter(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))]) for p in pieces)
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: FakeOpenAI)
+    for citations in ("inline", "none", "refs"):
+        monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+        out = list(qa.answer_with_llm_stream("holidays?", RETRIEVED, model="m", citations=citations))
+        assert len(out) > 1
+        assert "".join(out) == qa._apply_citations("".join(pieces), RETRIEVED, citations)
+        assert "[ch" not in "".join(out[:-1]) or citations == "inline"
+        # the finished stream is cached for the non-streaming path too
+        again = qa.answer_with_llm("holidays?", RETRIEVED, model="m", citations=citations)
+        assert again == "".join(out)
+
+
+def test_stream_shares_the_semantic_cache(monkeypatch):
+    import numpy as np
+    import retriever
+
+    def embed(text):
+        vec = np.array([[1.0, 0.1, 0.0]] if "holiday" in text.lower() else [[0.0, 0.2, 1.0]], dtype=np.float32)
+        vec.flags.writeable = False
+        return vec
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Nowruz [chunk:0]."))])])
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: FakeOpenAI)
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+    monkeypatch.setattr(retriever, "_sbert_query", embed)
+    index = {"meta": {"emb": "sbert", "normalized": True}, "chunks": ["a", "b"], "vectors": np.eye(2, 3, dtype=np.float32)}
+
+    streamed = "".join(qa.answer_with_llm_stream("What are the holidays?", RETRIEVED, model="m", index=index))
+    # a paraphrase is served from the cache the stream filled, streamed or not
+    assert qa.answer_with_llm("List the holidays", RETRIEVED, model="m", index=index) == streamed
+    assert list(qa.answer_with_llm_stream("Which holidays are there?", RETRIEVED, model="m", index=index)) == [streamed]
+    assert len(calls) == 1
+
+
+def test_hedged_request_takes_the_faster_copy():
+    import asyncio
+
+    delays = [1.0, 0.01]
+    started, cancelled = [], []
+
+    async def call():
+        i = len(started)
+        started.append(i)
+        try:
+            await asyncio.sleep(delays[i])
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        return f"reply {i}"
+
+    assert asyncio.run(qa._hedged(call, 0.05)) == "reply 1"
+    assert started == [0, 1] and cancelled == [0]
+
+    started.clear()
+    delays[:] = [0.01, 0.01]
+    assert asyncio.run(qa._hedged(call, 0.5)) == "reply 0"
+    assert started == [0]  # answered before the hedge delay
+
+
+def test_decisive_top_hit_skips_the_llm(monkeypatch):
+    calls = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(qa, "_openai_cls", lambda: _fake_openai(calls))
+    monkeypatch.setattr(qa, "_LLM_CACHE", qa._ResponseCache())
+
+    decisive = [(0.95, "Holidays include Nowruz.", 4), (0.4, "Vacation policy allows carryover.", 1)]
+    out = qa.answer_with_llm("holidays?", decisive, model="m", citations="refs")
+    assert out == qa.answer_offline("holidays?", decisive[:1], citations="refs")
+    assert "".join(qa.answer_with_llm_stream("holidays?", decisive, model="m", citations="refs")) == out
+    assert calls == []
+
+    close = [(0.95, "Holidays include Nowruz.", 4), (0.9, "National days are holidays.", 1)]
+    qa.answer_with_llm("holidays?", close, model="m", citations="refs")
+    assert len(calls) == 1
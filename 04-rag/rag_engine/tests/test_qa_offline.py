@@ -16,3 +16,22 @@ def test_answer_offline_shapes_response():
     out = answer_offline("What are the holidays?", retrieved)
     assert "Offline summary" in out
     assert "[chunk:0" in out
+
+
+def test_first_lines_matches_splitlines():
+    from qa import _first_lines
+
+    def reference(s, n=2):
+        return " ".join([ln.strip() for ln in s.splitlines() if ln.strip()][:n])
+
+    for s in ("", "one", "\n\n  a  \r\n\tb\rc", "x\u2028y\x1cz", "  \n \n", "a\fb\vc\x85d"):
+        for n in (1, 2, 3):
+            assert _first_lines(s, n) == reference(s, n)
+
+
+def test_build_context_labels_each_chunk():
+    from prompts import build_context
+
+    retrieved = [(0.9, "Alpha.", 3), (0.5, "Beta.", 7)]
+    assert build_context(retrieved) == "[chunk:3]\nAlpha.\n\n[chunk:7]\nBeta.\n"
+    assert build_context([]) == ""
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os, sys
+TEST_DIR = os.path.dirname(__file__)
+ROOT_DIR = os.path.abspath(os.path.join(TEST_DIR, ".."))
+if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
+
+import socket
+import threading
+
+import pytest
+
+from indexer import build_index, save_index
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_served_answer_matches_cold_query(tmp_path):
+    import server
+
+    text = (
+        "The handbook covers vacation policy and benefits.\n"
+        "Holidays include Nowruz and other national days.\n"
+        "Employees may request leave via the HR portal.\n"
+    )
+    path = str(tmp_path / "index")
+    index = build_index(text, lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    save_index(index, path)
+    sock = str(tmp_path / "rag.sock")
+    req = {"q": "What are the holidays?", "top_k": 2, "citations": "refs"}
+
+    assert server.ask(path, req, sock) is None  # nothing listening yet
+    srv = server.make_server(path, sock)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        assert server.ask(path, req, sock) == server.answer(index, req)
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert not os.path.exists(sock)
+
+
+
+def _touch_meta(path):
+    # bump meta.json's mtime so the change shows even within the clock's resolution
+    meta = os.path.join(path, "meta.json")
+    st = os.stat(meta)
+    os.utime(meta, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_reload_retries_when_index_changes_during_load(tmp_path, monkeypatch):
+    import indexer
+    import server
+
+    path = str(tmp_path / "index")
+    old = build_index("Old text about vacation policy.\n", lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    new = build_index("New text about holidays and Nowruz.\n", lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    save_index(old, path)
+    srv = server.make_server(path, str(tmp_path / "rag.sock"))
+    try:
+        real_load, calls = indexer.load_index, []
+
+        def load_during_save(p):
+            calls.append(p)
+            loaded = real_load(p)
+            if len(calls) == 1:  # a save lands while the first reload reads
+                save_index(new, p)
+                _touch_meta(p)
+            return loaded
+
+        _touch_meta(path)
+        monkeypatch.setattr(indexer, "load_index", load_during_save)
+        assert list(srv.current_index()["chunks"]) == list(new["chunks"])
+        assert len(calls) == 2
+    finally:
+        srv.server_close()
+
+
+def test_save_writes_meta_last(tmp_path, monkeypatch):
+    import indexer
+
+    index = build_index("Some text to index.\n", lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    renamed, real_replace = [], os.replace
+
+    def replace(src, dst):
+        renamed.append(os.path.basename(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(indexer.os, "replace", replace)
+    save_index(index, str(tmp_path / "index"))
+    assert renamed[-1] == "meta.json"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_socket_is_private_to_the_user(tmp_path, monkeypatch):
+    import stat
+    import tempfile
+    import server
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    path = str(tmp_path / "index")
+    save_index(build_index("Holidays include Nowruz.\n", lang="en", emb_name="tfidf", chunk_size=8, overlap=2), path)
+    sock = server.socket_path(path)
+    assert os.path.dirname(sock) == str(tmp_path / f"rag-{os.getuid()}")
+    assert stat.S_IMODE(os.stat(os.path.dirname(sock)).st_mode) == 0o700
+
+    srv = server.make_server(path)
+    try:
+        assert stat.S_IMODE(os.stat(sock).st_mode) == 0o600
+        req = {"q": "holidays?", "top_k": 1, "citations": "none"}
+        t = threading.Thread(target=srv.serve_forever, daemon=True)
+        t.start()
+        assert server.ask(path, req) is not None
+        # a socket owned by someone else is never used
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(sock).st_uid + 1)
+        assert server.ask(path, req, sock) is None
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_socket_dir_rejects_a_shared_directory(tmp_path, monkeypatch):
+    import tempfile
+    import server
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    os.mkdir(tmp_path / f"rag-{os.getuid()}", 0o777)
+    os.chmod(tmp_path / f"rag-{os.getuid()}", 0o777)
+    with pytest.raises(PermissionError):
+        server.socket_path(str(tmp_path / "index"))
+    assert server.ask(str(tmp_path / "index"), {"q": "x"}) is None
+
+
+def test_request_cannot_choose_the_llm_endpoint(monkeypatch):
+    import qa
+    import server
+
+    seen = {}
+
+    def fake_answer(q, hits, **kwargs):
+        seen.update(kwargs)
+        return "ok"
+
+    monkeypatch.setattr(qa, "answer_with_llm", fake_answer)
+    index = build_index("Holidays include Nowruz.\n", lang="en", emb_name="tfidf", chunk_size=8, overlap=2)
+    req = {"q": "holidays?", "llm": True, "model": "x", "base_url": "http://attacker.example"}
+    assert server.answer(index, req) == "ok"
+    assert "base_url" not in seen and "model" not in seen